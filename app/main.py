@@ -4,6 +4,11 @@ from contextlib import asynccontextmanager
 
 from app.routers import auth, chat, contracts, security, deployment, templates, bots
 from app.config import settings
+from app.services.audit_jobs import audit_jobs
+from app.services.claude_service import claude_service
+from app.services.deployment_service import deployment_service
+from app.services.security_service import security_service
+from app.services.solc_manager import solc_manager
 
 
 @asynccontextmanager
@@ -12,9 +17,19 @@ async def lifespan(app: FastAPI):
     print("INFRA FORGE API Starting...")
     print(f"Version: {settings.APP_VERSION}")
     print(f"CORS Origins: {settings.CORS_ORIGINS}")
+    await solc_manager.start()
+    await security_service.slither_workers.start()
+    await deployment_service.providers.start()
     yield
     # Shutdown
     print("INFRA FORGE API Shutting down...")
+    await audit_jobs.shutdown()
+    await claude_service.shutdown()
+    await security_service.slither_workers.shutdown()
+    await deployment_service.tracker.shutdown()
+    await deployment_service.fees.shutdown()
+    deployment_service.gas_profiler.shutdown()
+    await deployment_service.providers.shutdown()
 
 
 app = FastAPI(
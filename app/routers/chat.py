@@ -3,6 +3,7 @@ from fastapi.responses import StreamingResponse
 from app.schemas.chat import ChatRequest, ChatResponse, ChatMessage
 from app.services.claude_service import claude_service
 from datetime import datetime
+from contextlib import aclosing
 import json
 
 router = APIRouter()
@@ -17,11 +18,14 @@ async def send_message(request: ChatRequest):
         if request.stream:
             # Streaming response
             async def generate():
-                async for chunk in claude_service.generate_response(
+                chunks = claude_service.generate_response(
                     messages=[{"role": msg.role, "content": msg.content} for msg in request.messages],
                     stream=True
-                ):
-                    yield f"data: {json.dumps({'content': chunk})}\n\n"
+                )
+                # Closed on client disconnect, which closes the upstream stream too
+                async with aclosing(chunks) as chunks:
+                    async for chunk in chunks:
+                        yield f"data: {json.dumps({'content': chunk})}\n\n"
                 yield "data: [DONE]\n\n"
 
             return StreamingResponse(generate(), media_type="text/event-stream")
@@ -56,3 +60,11 @@ async def analyze_contract(code: str):
         return analysis
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/usage")
+async def get_usage():
+    """
+    Token usage and prompt cache hit rate of recent chat requests
+    """
+    return claude_service.usage_stats()
@@ -1,17 +1,40 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import List, Optional
+import json
+from contextlib import aclosing
 from app.services.deployment_service import deployment_service, CHAINS
+from app.services.solc_manager import solc_manager
 
 router = APIRouter()
 
 
 class DeployRequest(BaseModel):
     chain: str
-    source_code: str
+    source_code: Optional[str] = None
+    artifact_id: Optional[str] = None  # From /compile; replaces source_code
     contract_name: str
     constructor_args: List = []
     private_key: str
+    optimizer_runs: Optional[int] = Field(None, ge=0)  # Enables the optimizer; unused with artifact_id
+
+
+class MultiDeployRequest(BaseModel):
+    chains: List[str]
+    source_code: Optional[str] = None
+    artifact_id: Optional[str] = None
+    contract_name: str
+    constructor_args: List = []
+    private_key: str
+    optimizer_runs: Optional[int] = Field(None, ge=0)  # Enables the optimizer; unused with artifact_id
+
+
+class GasProfileRequest(BaseModel):
+    source_code: Optional[str] = None
+    artifact_id: Optional[str] = None
+    contract_name: Optional[str] = None  # Default: every deployable contract
+    constructor_args: Optional[List] = None  # For contract_name only; default: sample arguments
 
 
 class DeploymentStatus(BaseModel):
@@ -20,6 +43,7 @@ class DeploymentStatus(BaseModel):
     chain: str
     explorer_url: str
     status: str = "success"
+    timings_ms: Optional[dict] = None  # Per stage: compile, preflight, sign, broadcast, receipt
 
 
 @router.get("/chains")
@@ -41,15 +65,48 @@ async def get_supported_chains():
     }
 
 
+@router.get("/chains/health")
+async def get_chains_health():
+    """
+    Latest background health check of each chain's RPC
+    """
+    return {"chains": deployment_service.providers.health()}
+
+
+@router.get("/chains/{chain}/fees")
+async def get_chain_fees(chain: str):
+    """
+    Cached base fee, priority fees and gas price of a chain
+    """
+    if chain not in CHAINS:
+        raise HTTPException(status_code=404, detail=f"Unsupported chain: {chain}")
+    try:
+        return await deployment_service.fees.fees(chain)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/compilers")
+async def get_compilers():
+    """
+    Installed solc versions and versions being installed
+    """
+    return solc_manager.versions()
+
+
 @router.post("/compile")
-async def compile_contract(source_code: str, contract_name: str):
+async def compile_contract(source_code: str, contract_name: str, optimizer_runs: Optional[int] = Query(None, ge=0)):
     """
-    Compile Solidity contract
+    Compile Solidity contract; the returned artifact ID can replace the
+    source in estimate-gas and deploy requests
     """
     try:
-        result = deployment_service.compile_contract(source_code, contract_name)
+        result = await deployment_service.compile_contract(
+            source_code, contract_name, optimizer_runs=optimizer_runs
+        )
         return {
             "success": True,
+            "artifact_id": result["artifact_id"],
             "abi": result["abi"],
             "bytecode": result["bytecode"][:100] + "...",  # Truncate for display
             "message": "Contract compiled successfully"
@@ -69,13 +126,112 @@ async def deploy_contract(request: DeployRequest):
             source_code=request.source_code,
             contract_name=request.contract_name,
             constructor_args=request.constructor_args,
-            private_key=request.private_key
+            private_key=request.private_key,
+            artifact_id=request.artifact_id,
+            optimizer_runs=request.optimizer_runs
         )
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/deploy/multi")
+async def deploy_multi(request: MultiDeployRequest):
+    """
+    Compile once and deploy to several chains concurrently, returning each
+    chain's deployment once all have a receipt (or still pending, with
+    timed_out set, after the receipt timeout)
+    """
+    try:
+        return await deployment_service.deploy_multi(
+            chains=request.chains,
+            source_code=request.source_code,
+            contract_name=request.contract_name,
+            constructor_args=request.constructor_args,
+            private_key=request.private_key,
+            artifact_id=request.artifact_id,
+            optimizer_runs=request.optimizer_runs
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/deploy/multi/stream")
+async def stream_deploy_multi(request: MultiDeployRequest):
+    """
+    Deploy to several chains concurrently, streaming each chain's submission
+    and status changes as Server-Sent Events as they happen
+    """
+
+    async def generate():
+        try:
+            deployments = deployment_service.deploy_to_chains(
+                chains=request.chains,
+                source_code=request.source_code,
+                contract_name=request.contract_name,
+                constructor_args=request.constructor_args,
+                private_key=request.private_key,
+                artifact_id=request.artifact_id,
+                optimizer_runs=request.optimizer_runs
+            )
+            async with aclosing(deployments) as events:
+                async for event in events:
+                    yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            yield f"data: {json.dumps({'event': 'error', 'status': 500, 'error': str(e)})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(generate(), media_type="text/event-stream")
+
+
+@router.post("/deployments", status_code=202)
+async def submit_deployment(request: DeployRequest):
+    """
+    Broadcast a deployment and return its transaction hash and deployment ID
+    without waiting for the receipt
+    """
+    try:
+        return await deployment_service.submit_deployment(
+            chain=request.chain,
+            source_code=request.source_code,
+            contract_name=request.contract_name,
+            constructor_args=request.constructor_args,
+            private_key=request.private_key,
+            artifact_id=request.artifact_id,
+            optimizer_runs=request.optimizer_runs
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/deployments/{deployment_id}")
+async def get_deployment(deployment_id: str):
+    """
+    Get the status of a tracked deployment
+    """
+    deployment = deployment_service.tracker.get(deployment_id)
+    if deployment is None:
+        raise HTTPException(status_code=404, detail="Deployment not found")
+    return deployment
+
+
+@router.get("/deployments/{deployment_id}/events")
+async def stream_deployment_events(deployment_id: str):
+    """
+    Follow a deployment (pending, mined, confirmed or failed) as Server-Sent Events
+    """
+    if deployment_service.tracker.get(deployment_id) is None:
+        raise HTTPException(status_code=404, detail="Deployment not found")
+
+    async def generate():
+        async with aclosing(deployment_service.tracker.events(deployment_id)) as events:
+            async for event in events:
+                yield f"data: {json.dumps(event)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(generate(), media_type="text/event-stream")
+
+
 @router.post("/estimate-gas")
 async def estimate_gas(request: DeployRequest):
     """
@@ -86,8 +242,27 @@ async def estimate_gas(request: DeployRequest):
             chain=request.chain,
             source_code=request.source_code,
             contract_name=request.contract_name,
-            constructor_args=request.constructor_args
+            constructor_args=request.constructor_args,
+            artifact_id=request.artifact_id,
+            optimizer_runs=request.optimizer_runs
         )
         return estimate
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/gas-profile")
+async def profile_gas(request: GasProfileRequest):
+    """
+    Deploy to a local in-process EVM and report deployment gas, code size
+    against the 24 KB limit and gas per function, without an RPC
+    """
+    try:
+        return await deployment_service.profile_gas(
+            source_code=request.source_code,
+            contract_name=request.contract_name,
+            constructor_args=request.constructor_args,
+            artifact_id=request.artifact_id
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,6 +1,13 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.services.security_service import security_service
+from typing import List, Optional
+import json
+from contextlib import aclosing
+from app.config import settings
+from app.services.audit_jobs import audit_jobs
+from app.services.security_service import MYTHRIL_PROFILES, mythril_budget, security_service
+from app.services.tool_pool import QueueFullError
 
 router = APIRouter()
 
@@ -8,6 +15,32 @@ router = APIRouter()
 class AuditRequest(BaseModel):
     code: str
     filename: str = "Contract.sol"
+    priority: int = 0  # Lower runs first
+    profile: str = "standard"  # Mythril depth: quick, standard or deep
+    time_budget: Optional[float] = None  # Seconds for Mythril; defaults to the profile's budget
+
+
+class BatchSource(BaseModel):
+    code: str
+    filename: str = "Contract.sol"
+
+
+class BatchAuditRequest(BaseModel):
+    sources: List[BatchSource]
+    priority: int = 0
+    profile: str = "standard"
+    time_budget: Optional[float] = None
+
+
+def queue_full(e: QueueFullError) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+
+
+def validate_profile(profile: str, time_budget: Optional[float]) -> None:
+    try:
+        mythril_budget(profile, time_budget)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/audit")
@@ -15,9 +48,82 @@ async def run_full_audit(request: AuditRequest):
     """
     Run complete security audit (Slither + Mythril)
     """
+    validate_profile(request.profile, request.time_budget)
     try:
-        result = await security_service.full_audit(request.code)
+        result = await security_service.full_audit(
+            request.code,
+            request.filename,
+            priority=request.priority,
+            profile=request.profile,
+            time_budget=request.time_budget
+        )
         return result
+    except QueueFullError as e:
+        raise queue_full(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/quick-scan")
+async def run_quick_scan(request: AuditRequest):
+    """
+    Instant in-process rule scan (tx.origin, delegatecall, unchecked calls, reentrancy guards, pragmas)
+    """
+    try:
+        return await security_service.quick_scan(request.code)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/audit/stream")
+async def stream_full_audit(request: AuditRequest):
+    """
+    Run complete security audit, streaming each tool's findings as Server-Sent Events
+    """
+    validate_profile(request.profile, request.time_budget)
+
+    async def generate():
+        try:
+            audit = security_service.stream_audit(
+                request.code,
+                request.filename,
+                priority=request.priority,
+                profile=request.profile,
+                time_budget=request.time_budget
+            )
+            async with aclosing(audit) as events:
+                async for event in events:
+                    yield f"data: {json.dumps(event)}\n\n"
+        except QueueFullError as e:
+            yield f"data: {json.dumps({'event': 'error', 'status': 429, 'error': str(e)})}\n\n"
+        except Exception as e:
+            yield f"data: {json.dumps({'event': 'error', 'status': 500, 'error': str(e)})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(generate(), media_type="text/event-stream")
+
+
+@router.post("/audit/batch")
+async def run_batch_audit(request: BatchAuditRequest):
+    """
+    Audit many contracts at once, deduplicating identical and cached sources
+    """
+    if not request.sources:
+        raise HTTPException(status_code=400, detail="No sources provided")
+    if len(request.sources) > settings.BATCH_AUDIT_MAX_SOURCES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large (max {settings.BATCH_AUDIT_MAX_SOURCES} sources)"
+        )
+    validate_profile(request.profile, request.time_budget)
+
+    try:
+        return await security_service.batch_audit(
+            [(source.code, source.filename) for source in request.sources],
+            priority=request.priority,
+            profile=request.profile,
+            time_budget=request.time_budget
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -28,8 +134,12 @@ async def run_slither(request: AuditRequest):
     Run Slither static analysis
     """
     try:
-        result = await security_service.run_slither(request.code, request.filename)
+        result = await security_service.run_slither(
+            request.code, request.filename, priority=request.priority
+        )
         return result
+    except QueueFullError as e:
+        raise queue_full(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -39,8 +149,111 @@ async def run_mythril(request: AuditRequest):
     """
     Run Mythril symbolic analysis
     """
+    validate_profile(request.profile, request.time_budget)
     try:
-        result = await security_service.run_mythril(request.code)
+        result = await security_service.run_mythril(
+            request.code,
+            request.filename,
+            priority=request.priority,
+            profile=request.profile,
+            time_budget=request.time_budget
+        )
         return result
+    except QueueFullError as e:
+        raise queue_full(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/profiles")
+async def get_analysis_profiles():
+    """
+    List Mythril analysis profiles and their limits
+    """
+    return {"profiles": MYTHRIL_PROFILES, "max_time_budget": settings.MYTHRIL_MAX_TIME_BUDGET_SECONDS}
+
+
+@router.get("/queue")
+async def get_queue_stats():
+    """
+    Get concurrency, queue depth and wait-time metrics for each analysis tool
+    """
+    return security_service.queue_stats()
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """
+    Get audit result cache hit/miss counters
+    """
+    return security_service.cache.stats()
+
+
+@router.post("/jobs", status_code=202)
+async def submit_audit_job(request: AuditRequest):
+    """
+    Queue a full security audit and return its job ID immediately
+    """
+    validate_profile(request.profile, request.time_budget)
+    try:
+        return await audit_jobs.submit(
+            request.code,
+            request.filename,
+            priority=request.priority,
+            profile=request.profile,
+            time_budget=request.time_budget
+        )
+    except QueueFullError as e:
+        raise queue_full(e)
+
+
+@router.get("/jobs/{job_id}")
+async def get_audit_job(job_id: str):
+    """
+    Get the status of an audit job
+    """
+    job = await audit_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_audit_job_result(job_id: str):
+    """
+    Get the report of a completed audit job
+    """
+    job = await audit_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return await audit_jobs.get_result(job_id)
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_audit_job(job_id: str):
+    """
+    Cancel a queued or running audit job
+    """
+    job = await audit_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_audit_job_events(job_id: str):
+    """
+    Follow an audit job's progress as Server-Sent Events
+    """
+    if await audit_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def generate():
+        async with aclosing(audit_jobs.events(job_id)) as events:
+            async for event in events:
+                yield f"data: {json.dumps(event)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(generate(), media_type="text/event-stream")
@@ -0,0 +1,334 @@
+import asyncio
+import json
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import aclosing
+from datetime import datetime
+from typing import AsyncGenerator, Optional
+
+from app.config import settings
+from app.services.events import EventHub
+from app.services.security_service import security_service
+from app.services.tool_pool import QueueFullError
+
+TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+
+
+class JobStore(ABC):
+    """Storage backend for audit job state, results and progress events"""
+
+    @abstractmethod
+    async def save(self, job: dict) -> None:
+        ...
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def save_result(self, job_id: str, result: dict) -> None:
+        ...
+
+    @abstractmethod
+    async def get_result(self, job_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def publish(self, job_id: str, event: dict) -> None:
+        ...
+
+    @abstractmethod
+    def events(self, job_id: str) -> AsyncGenerator[dict, None]:
+        """Replay the job's past events, then follow new ones"""
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryJobStore(JobStore):
+    """Process-local job store (default)"""
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl = ttl_seconds
+        self._jobs = {}
+        self._results = {}
+        self._history = {}
+        self._expires = {}
+        self._next_purge = 0.0
+        self._hub = EventHub()
+
+    async def save(self, job: dict) -> None:
+        now = time.monotonic()
+        self._jobs[job["id"]] = dict(job)
+        self._expires[job["id"]] = now + self.ttl
+
+        if now >= self._next_purge:
+            self._purge(now)
+            self._next_purge = now + 60
+
+    def _purge(self, now: float) -> None:
+        for job_id in [job_id for job_id, expires in self._expires.items() if expires <= now]:
+            del self._expires[job_id]
+            self._jobs.pop(job_id, None)
+            self._results.pop(job_id, None)
+            self._history.pop(job_id, None)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def save_result(self, job_id: str, result: dict) -> None:
+        self._results[job_id] = result
+
+    async def get_result(self, job_id: str) -> Optional[dict]:
+        return self._results.get(job_id)
+
+    async def publish(self, job_id: str, event: dict) -> None:
+        history = self._history.setdefault(job_id, [])
+        event = {**event, "seq": len(history) + 1}
+        history.append(event)
+        self._hub.publish(job_id, event)
+
+    async def events(self, job_id: str) -> AsyncGenerator[dict, None]:
+        queue = self._hub.subscribe(job_id)
+        try:
+            last_seq = 0
+            for event in list(self._history.get(job_id, [])):
+                last_seq = event["seq"]
+                yield event
+            while True:
+                event = await queue.get()
+                if event["seq"] > last_seq:
+                    last_seq = event["seq"]
+                    yield event
+        finally:
+            self._hub.unsubscribe(job_id, queue)
+
+
+class RedisJobStore(JobStore):
+    """Job store shared between API workers through Redis"""
+
+    def __init__(self, url: str, ttl_seconds: int):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("Redis job backend requires the redis package. Install with: pip install redis")
+
+        self.redis = redis.from_url(url, decode_responses=True)
+        self.ttl = ttl_seconds
+
+    def _key(self, job_id: str, suffix: str) -> str:
+        return f"audit_job:{job_id}:{suffix}"
+
+    async def save(self, job: dict) -> None:
+        await self.redis.set(self._key(job["id"], "state"), json.dumps(job), ex=self.ttl)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        data = await self.redis.get(self._key(job_id, "state"))
+        return json.loads(data) if data else None
+
+    async def save_result(self, job_id: str, result: dict) -> None:
+        await self.redis.set(self._key(job_id, "result"), json.dumps(result), ex=self.ttl)
+
+    async def get_result(self, job_id: str) -> Optional[dict]:
+        data = await self.redis.get(self._key(job_id, "result"))
+        return json.loads(data) if data else None
+
+    async def publish(self, job_id: str, event: dict) -> None:
+        seq = await self.redis.incr(self._key(job_id, "seq"))
+        payload = json.dumps({**event, "seq": seq})
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.rpush(self._key(job_id, "events"), payload)
+            pipe.expire(self._key(job_id, "events"), self.ttl)
+            pipe.expire(self._key(job_id, "seq"), self.ttl)
+            pipe.publish(self._key(job_id, "channel"), payload)
+            await pipe.execute()
+
+    async def events(self, job_id: str) -> AsyncGenerator[dict, None]:
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(self._key(job_id, "channel"))
+        try:
+            last_seq = 0
+            for payload in await self.redis.lrange(self._key(job_id, "events"), 0, -1):
+                event = json.loads(payload)
+                last_seq = event["seq"]
+                yield event
+
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                event = json.loads(message["data"])
+                if event["seq"] > last_seq:
+                    last_seq = event["seq"]
+                    yield event
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+class AuditJobManager:
+    """Runs full audits in the background and tracks them as jobs"""
+
+    def __init__(self):
+        self.store: JobStore = self._create_store()
+        self._tasks = {}
+        self._queued = set()  # Local jobs waiting for a run slot
+        self._running = asyncio.Semaphore(settings.AUDIT_JOB_MAX_RUNNING)
+
+    def _create_store(self) -> JobStore:
+        if settings.AUDIT_JOB_BACKEND == "redis":
+            return RedisJobStore(settings.REDIS_URL, settings.AUDIT_JOB_TTL_SECONDS)
+        if settings.AUDIT_JOB_BACKEND == "memory":
+            return MemoryJobStore(settings.AUDIT_JOB_TTL_SECONDS)
+        raise ValueError(f"Unknown audit job backend: {settings.AUDIT_JOB_BACKEND}")
+
+    async def submit(
+        self,
+        code: str,
+        filename: str = "Contract.sol",
+        priority: int = 0,
+        profile: str = "standard",
+        time_budget: Optional[float] = None
+    ) -> dict:
+        """Queue a full audit and return the new job"""
+
+        if len(self._queued) >= settings.AUDIT_JOB_MAX_PENDING:
+            raise QueueFullError("audit-jobs", len(self._queued))
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "filename": filename,
+            "priority": priority,
+            "profile": profile,
+            "time_budget": time_budget,
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "completed_tools": [],
+            "error": None
+        }
+        await self.store.save(job)
+        await self.store.publish(job["id"], {"event": "status", "status": "queued"})
+
+        task = asyncio.create_task(self._run(job, code, filename, priority, profile, time_budget))
+        self._tasks[job["id"]] = task
+        self._queued.add(job["id"])
+        task.add_done_callback(lambda _: self._tasks.pop(job["id"], None))
+        return job
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.store.get(job_id)
+
+    async def get_result(self, job_id: str) -> Optional[dict]:
+        return await self.store.get_result(job_id)
+
+    async def cancel(self, job_id: str) -> Optional[dict]:
+        """Cancel a queued or running job.
+
+        A job run by this process is cancelled and returned with its final
+        status. One owned by another worker is flagged, and returned with
+        its current status and ``cancel_requested`` set until that worker
+        stops it.
+        """
+
+        job = await self.store.get(job_id)
+        if job is None or job["status"] in TERMINAL_STATUSES:
+            return job
+
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+            await asyncio.wait([task])
+            return await self.store.get(job_id)
+
+        # Job is owned by another worker, which checks the flag before
+        # starting and listens for the event while running
+        job["cancel_requested"] = True
+        await self.store.save(job)
+        await self.store.publish(job_id, {"event": "cancel_requested"})
+        return job
+
+    async def events(self, job_id: str) -> AsyncGenerator[dict, None]:
+        """Progress events for a job, ending once it reaches a terminal status"""
+
+        async for event in self.store.events(job_id):
+            yield event
+            if event["event"] == "status" and event["status"] in TERMINAL_STATUSES:
+                return
+
+    async def _run(
+        self,
+        job: dict,
+        code: str,
+        filename: str,
+        priority: int,
+        profile: str,
+        time_budget: Optional[float]
+    ) -> None:
+        watcher = None
+        try:
+            async with self._running:
+                self._queued.discard(job["id"])
+                stored = await self.store.get(job["id"])
+                if stored and stored.get("cancel_requested"):
+                    raise asyncio.CancelledError()
+
+                watcher = asyncio.create_task(self._watch_cancel(job["id"], asyncio.current_task()))
+                await self._update(job, status="running", started_at=datetime.now().isoformat())
+
+                audit = security_service.stream_audit(code, filename, priority, profile, time_budget)
+                async with aclosing(audit) as events:
+                    async for event in events:
+                        if event["event"] == "report":
+                            await self.store.save_result(job["id"], event)
+                            continue
+
+                        job["completed_tools"].append(event["event"])
+                        await self.store.save(job)
+                        await self.store.publish(job["id"], {
+                            "event": "progress",
+                            "tool": event["event"],
+                            "summary": event["summary"],
+                            "error": event["error"]
+                        })
+
+            await self._finish(job, "completed")
+        except asyncio.CancelledError:
+            await self._finish(job, "cancelled")
+        except Exception as e:
+            await self._finish(job, "failed", error=str(e))
+        finally:
+            self._queued.discard(job["id"])
+            if watcher is not None:
+                watcher.cancel()
+
+    async def _watch_cancel(self, job_id: str, task: asyncio.Task) -> None:
+        async for event in self.store.events(job_id):
+            if event["event"] == "cancel_requested":
+                task.cancel()
+                return
+
+    async def _update(self, job: dict, **fields) -> None:
+        job.update(fields)
+        await self.store.save(job)
+        if "status" in fields:
+            await self.store.publish(job["id"], {"event": "status", "status": fields["status"]})
+
+    async def _finish(self, job: dict, status: str, error: Optional[str] = None) -> None:
+        await self._update(job, status=status, error=error, finished_at=datetime.now().isoformat())
+
+    async def shutdown(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.store.close()
+
+
+audit_jobs = AuditJobManager()
@@ -1,9 +1,15 @@
 import anthropic
+from collections import deque
+from datetime import datetime
 from typing import AsyncGenerator
 from app.config import settings
 import json
 import re
 
+CACHE_BREAKPOINT = {"type": "ephemeral"}
+
+USAGE_FIELDS = ["input_tokens", "cache_creation_input_tokens", "cache_read_input_tokens", "output_tokens"]
+
 SYSTEM_PROMPT = """You are FORGE AI, the intelligent assistant for INFRA FORGE - a smart contract development platform for INFRA Group and Nardiha Holdings.
 
 Your capabilities:
@@ -38,8 +44,22 @@ When generating code:
 
 
 class ClaudeService:
+    """Claude API access that never blocks the event loop.
+
+    The async client streams tokens with async iteration, so one long
+    completion doesn't hold up other requests. Closing the generator (e.g.
+    when the SSE client disconnects and the response task is cancelled)
+    closes the upstream stream instead of reading it to the end.
+
+    Chat requests mark the system prompt and the conversation so far as
+    cacheable, so each turn reads the previous turns' prefix from the prompt
+    cache instead of processing it again. Token usage, including cache
+    reads and writes, is kept for the last CHAT_USAGE_WINDOW requests.
+    """
+
     def __init__(self):
-        self.client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+        self.client = anthropic.AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
+        self.usage = deque(maxlen=settings.CHAT_USAGE_WINDOW)
 
     async def generate_response(
         self,
@@ -48,21 +68,43 @@ class ClaudeService:
     ) -> AsyncGenerator[str, None]:
         """Generate AI response with optional streaming"""
 
-        response = self.client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=8192,
-            system=SYSTEM_PROMPT,
-            messages=messages,
-            stream=stream
-        )
+        request = {
+            "model": "claude-sonnet-4-20250514",
+            "max_tokens": 8192,
+            "system": [{"type": "text", "text": SYSTEM_PROMPT, "cache_control": CACHE_BREAKPOINT}],
+            "messages": with_cache_breakpoint(messages)
+        }
 
         if stream:
-            for event in response:
-                if event.type == "content_block_delta":
-                    yield event.delta.text
+            async with self.client.messages.stream(**request) as response:
+                async for text in response.text_stream:
+                    yield text
+                message = await response.get_final_message()
+            self._record_usage(message.usage)
         else:
+            response = await self.client.messages.create(**request)
+            self._record_usage(response.usage)
             yield response.content[0].text
 
+    def _record_usage(self, usage) -> None:
+        self.usage.append({
+            **{field: getattr(usage, field, None) or 0 for field in USAGE_FIELDS},
+            "at": datetime.now().isoformat()
+        })
+
+    def usage_stats(self) -> dict:
+        """Token totals and prompt cache hit rate over the recent chat requests"""
+
+        totals = {field: sum(request[field] for request in self.usage) for field in USAGE_FIELDS}
+        prompt_tokens = totals["input_tokens"] + totals["cache_creation_input_tokens"] + totals["cache_read_input_tokens"]
+        return {
+            "requests": len(self.usage),
+            **totals,
+            # Share of prompt tokens served from the cache
+            "cache_hit_rate": round(totals["cache_read_input_tokens"] / prompt_tokens, 3) if prompt_tokens else None,
+            "recent": list(self.usage)[-10:]
+        }
+
     async def analyze_contract(self, code: str) -> dict:
         """Analyze smart contract for security issues"""
 
@@ -98,7 +140,7 @@ Score calculation:
 - Low severity: -2 points each
 - Start from 100 points"""
 
-        response = self.client.messages.create(
+        response = await self.client.messages.create(
             model="claude-sonnet-4-20250514",
             max_tokens=4096,
             messages=[{"role": "user", "content": analysis_prompt}]
@@ -120,5 +162,26 @@ Score calculation:
             "gas_optimizations": []
         }
 
+    async def shutdown(self) -> None:
+        await self.client.close()
+
+
+def with_cache_breakpoint(messages: list[dict]) -> list[dict]:
+    """Copy of the conversation with a cache breakpoint on its last message.
+
+    The whole conversation is written to the cache; on the next turn it is
+    the prefix of the new request and is read back instead of reprocessed.
+    """
+
+    if not messages or not messages[-1]["content"]:
+        return messages
+
+    last = messages[-1]
+    content = last["content"]
+    if isinstance(content, str):
+        content = [{"type": "text", "text": content}]
+    content = [*content[:-1], {**content[-1], "cache_control": CACHE_BREAKPOINT}]
+    return [*messages[:-1], {**last, "content": content}]
+
 
 claude_service = ClaudeService()
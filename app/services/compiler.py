@@ -0,0 +1,217 @@
+import asyncio
+import json
+import os
+import re
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from solcx import compile_standard
+from solcx.exceptions import SolcError
+
+from app.config import settings
+from app.services.import_resolver import ImportResolutionError, ResolvedImports, import_resolver
+from app.services.result_cache import ResultCache, cache_key, exact_source_hash
+from app.services.solc_manager import SolcUnavailableError, solc_manager
+from app.services.tool_pool import ToolPool
+
+CONTRACT_OUTPUTS = [
+    "abi",
+    "evm.bytecode",
+    "evm.deployedBytecode",
+    "evm.methodIdentifiers",
+    "userdoc",
+    "devdoc"
+]
+
+
+ARTIFACT_ID_RE = re.compile(r"[0-9a-f]{64}")
+
+
+class CompilationError(Exception):
+    """Raised when solc rejects a source"""
+
+
+class CompilerService:
+    """Shared compilation stage: one solc standard-JSON run per source hash.
+
+    The resulting artifact (standard-JSON input and output: ASTs, ABIs,
+    bytecode and source maps) is consumed by the security tools and by
+    deployment, so the same source is not compiled once per consumer.
+    Artifacts are content-addressed by source, compiler version (picked
+    from the source's pragmas) and optimizer settings; the key doubles as
+    the artifact ID clients can send back instead of the source.
+
+    Library imports are resolved locally (see ``ImportResolver``) and the
+    versions of the libraries used are part of the key. Outputs are only
+    requested for the main source, so solc generates code for its contracts
+    and not for every library contract it imports.
+    """
+
+    def __init__(self):
+        self.pool = ToolPool(
+            "solc",
+            max_concurrency=settings.SOLC_MAX_CONCURRENCY or os.cpu_count() or 1,
+            max_queue=settings.SECURITY_QUEUE_MAX_DEPTH
+        )
+        self.cache = ResultCache(
+            "compilation",
+            memory_entries=settings.COMPILATION_CACHE_ENTRIES,
+            disk_dir=settings.COMPILATION_CACHE_DIR,
+            disk_max_bytes=settings.COMPILATION_CACHE_DISK_MAX_MB * 1024 * 1024
+        )
+
+    async def compile(
+        self,
+        source_code: str,
+        filename: str = "Contract.sol",
+        optimizer_runs: Optional[int] = None
+    ) -> dict:
+        """Compile a source (or return the cached artifact for it).
+
+        ``optimizer_runs`` enables the optimizer with that many runs.
+        """
+
+        version, binary, imports = await self.toolchain(source_code, filename)
+
+        optimizer = {"enabled": optimizer_runs is not None, "runs": 200 if optimizer_runs is None else optimizer_runs}
+        # Keyed on the exact source: the bytecode's metadata hash and every
+        # reported line number depend on its bytes
+        key = cache_key(
+            exact_source_hash(source_code), filename, version, json.dumps(optimizer, sort_keys=True), *imports.libraries
+        )
+        return await self.cache.get_or_compute(
+            key,
+            lambda: self._compile(source_code, filename, imports, optimizer, version, binary, key)
+        )
+
+    async def toolchain(self, source_code: str, filename: str = "Contract.sol") -> Tuple[str, str, ResolvedImports]:
+        """Compiler version and binary for a source, with the library sources it imports"""
+
+        try:
+            imports = await asyncio.to_thread(import_resolver.resolve, filename, source_code)
+            version, binary = await solc_manager.resolve(source_code, imports.pragmas)
+        except (ImportResolutionError, SolcUnavailableError) as e:
+            raise CompilationError(str(e))
+        return version, binary, imports
+
+    async def get_artifact(self, artifact_id: str) -> Optional[dict]:
+        """A previously compiled artifact, or None if unknown or evicted"""
+
+        if not ARTIFACT_ID_RE.fullmatch(artifact_id):
+            return None
+        return await self.cache.get(artifact_id)
+
+    async def _compile(
+        self,
+        source_code: str,
+        filename: str,
+        imports: ResolvedImports,
+        optimizer: dict,
+        version: str,
+        binary: str,
+        artifact_id: str
+    ) -> dict:
+        sources = {filename: {"content": source_code}}
+        sources.update((name, {"content": content}) for name, content in imports.sources.items())
+        standard_input = {
+            "language": "Solidity",
+            "sources": sources,
+            "settings": {
+                "optimizer": optimizer,
+                "outputSelection": {filename: {"*": CONTRACT_OUTPUTS, "": ["ast"]}}
+            }
+        }
+
+        async with self.pool.slot():
+            try:
+                output = await asyncio.to_thread(
+                    compile_standard, standard_input, solc_binary=binary
+                )
+            except SolcError as e:
+                raise CompilationError(f"Compilation failed: {e}")
+
+        return {
+            "id": artifact_id,
+            "source_hash": exact_source_hash(source_code),
+            "source_path": filename,
+            "solc_version": version,
+            "libraries": imports.libraries,
+            "input": standard_input,
+            "output": output
+        }
+
+    def solc_binary(self, artifact: dict) -> Optional[str]:
+        """Path of the solc binary an artifact was built with, for tools that compile on their own"""
+        return solc_manager.binary(artifact["solc_version"])
+
+
+def find_contract(artifact: dict, contract_name: str) -> dict:
+    """Compiled output for a named contract in an artifact"""
+
+    for contracts in artifact["output"].get("contracts", {}).values():
+        if contract_name in contracts:
+            return contracts[contract_name]
+
+    raise ValueError(f"Contract {contract_name} not found in compilation output")
+
+
+def deployable_contracts(artifact: dict) -> List[str]:
+    """Names of the contracts in the main source that have creation bytecode"""
+
+    contracts = artifact["output"].get("contracts", {}).get(artifact["source_path"], {})
+    return [name for name, data in contracts.items() if data["evm"]["bytecode"]["object"]]
+
+
+def write_sources(artifact: dict, directory: str) -> Path:
+    """Write the artifact's sources under ``directory`` and return the main source path"""
+
+    for path, source in artifact["input"]["sources"].items():
+        target = Path(directory) / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(source["content"])
+
+    return Path(directory) / artifact["source_path"]
+
+
+def source_line(artifact: dict, contract_name: str, pc: int, runtime: bool = True) -> Optional[int]:
+    """Map a bytecode offset back to a line in the main source using the solc source map"""
+
+    contract = artifact["output"]["contracts"][artifact["source_path"]][contract_name]
+    code = contract["evm"]["deployedBytecode" if runtime else "bytecode"]
+    try:
+        bytecode = bytes.fromhex(code["object"])
+    except ValueError:  # Unlinked library placeholders
+        return None
+
+    # Source maps are indexed by instruction, not byte offset
+    index, offset = 0, 0
+    while offset < pc and offset < len(bytecode):
+        opcode = bytecode[offset]
+        if 0x60 <= opcode <= 0x7f:  # PUSH1..PUSH32 carry inline data
+            offset += opcode - 0x5f
+        offset += 1
+        index += 1
+    if offset != pc:
+        return None
+
+    start, file_index = None, None
+    for i, entry in enumerate(code["sourceMap"].split(";")):
+        fields = entry.split(":")
+        if len(fields) > 0 and fields[0]:
+            start = int(fields[0])
+        if len(fields) > 2 and fields[2]:
+            file_index = int(fields[2])
+        if i == index:
+            break
+    else:
+        return None
+
+    main_id = artifact["output"]["sources"][artifact["source_path"]]["id"]
+    if start is None or file_index != main_id:
+        return None
+
+    content = artifact["input"]["sources"][artifact["source_path"]]["content"].encode()
+    return content[:start].count(b"\n") + 1
+
+
+compiler_service = CompilerService()
@@ -1,8 +1,19 @@
-from web3 import Web3
-from solcx import compile_source, install_solc, set_solc_version
-import json
-from typing import Optional, List
+import asyncio
+import os
+import time
+from contextlib import aclosing
+from typing import AsyncGenerator, List, Optional, Tuple
+
+from hexbytes import HexBytes
+from web3 import AsyncWeb3, Web3
+
 from app.config import settings
+from app.services.compiler import CompilationError, compiler_service, deployable_contracts, find_contract
+from app.services.deployment_tracker import TERMINAL_STATUSES, DeploymentTracker
+from app.services.fee_oracle import FeeOracle, expected_gas_price
+from app.services.gas_profiler import GasProfiler
+from app.services.nonce_manager import NonceManager, is_nonce_conflict
+from app.services.rpc import ProviderRegistry
 
 # Chain configurations
 CHAINS = {
@@ -10,169 +21,454 @@ CHAINS = {
         "name": "Ethereum Mainnet",
         "rpc": settings.ETHEREUM_RPC,
         "chain_id": 1,
-        "explorer": "https://etherscan.io"
+        "explorer": "https://etherscan.io",
+        "fee_ttl": 12  # Seconds; about one block
     },
     "ethereum_sepolia": {
         "name": "Ethereum Sepolia",
         "rpc": settings.ETHEREUM_SEPOLIA_RPC,
         "chain_id": 11155111,
-        "explorer": "https://sepolia.etherscan.io"
+        "explorer": "https://sepolia.etherscan.io",
+        "fee_ttl": 12
     },
     "bsc": {
         "name": "BNB Smart Chain",
         "rpc": settings.BSC_RPC,
         "chain_id": 56,
-        "explorer": "https://bscscan.com"
+        "explorer": "https://bscscan.com",
+        "fee_ttl": 3
     },
     "bsc_testnet": {
         "name": "BSC Testnet",
         "rpc": settings.BSC_TESTNET_RPC,
         "chain_id": 97,
-        "explorer": "https://testnet.bscscan.com"
+        "explorer": "https://testnet.bscscan.com",
+        "fee_ttl": 3
     },
     "polygon": {
         "name": "Polygon",
         "rpc": settings.POLYGON_RPC,
         "chain_id": 137,
-        "explorer": "https://polygonscan.com"
+        "explorer": "https://polygonscan.com",
+        "fee_ttl": 2
     },
     "polygon_mumbai": {
         "name": "Polygon Mumbai",
         "rpc": settings.POLYGON_MUMBAI_RPC,
         "chain_id": 80001,
-        "explorer": "https://mumbai.polygonscan.com"
+        "explorer": "https://mumbai.polygonscan.com",
+        "fee_ttl": 2
     },
     "arbitrum": {
         "name": "Arbitrum One",
         "rpc": settings.ARBITRUM_RPC,
         "chain_id": 42161,
-        "explorer": "https://arbiscan.io"
+        "explorer": "https://arbiscan.io",
+        "fee_ttl": 1
     },
     "avalanche": {
         "name": "Avalanche C-Chain",
         "rpc": settings.AVALANCHE_RPC,
         "chain_id": 43114,
-        "explorer": "https://snowtrace.io"
+        "explorer": "https://snowtrace.io",
+        "fee_ttl": 2
     },
     "fantom": {
         "name": "Fantom Opera",
         "rpc": settings.FANTOM_RPC,
         "chain_id": 250,
-        "explorer": "https://ftmscan.com"
+        "explorer": "https://ftmscan.com",
+        "fee_ttl": 1
     }
 }
 
 
 class DeploymentService:
     def __init__(self):
-        try:
-            install_solc("0.8.20")
-            set_solc_version("0.8.20")
-        except Exception as e:
-            print(f"Warning: Could not install solc: {e}")
+        self.providers = ProviderRegistry(CHAINS)
+        self.tracker = DeploymentTracker(self.providers, CHAINS)
+        self.nonces = NonceManager(self.providers)
+        self.fees = FeeOracle(self.providers, CHAINS)
+        self.gas_profiler = GasProfiler(settings.GAS_PROFILER_WORKERS or os.cpu_count() or 1)
+        self._verified_chains = set()
 
-    def compile_contract(self, source_code: str, contract_name: str) -> dict:
-        """Compile Solidity contract"""
+    async def compile_contract(
+        self,
+        source_code: Optional[str],
+        contract_name: str,
+        artifact_id: Optional[str] = None,
+        optimizer_runs: Optional[int] = None
+    ) -> dict:
+        """Compile Solidity contract, or load it from a cached artifact by ID.
+
+        The artifact is shared with the security tools.
+        """
 
         try:
-            compiled = compile_source(
-                source_code,
-                output_values=["abi", "bin"],
-                solc_version="0.8.20"
-            )
-
-            # Find the contract
-            for key, value in compiled.items():
-                if contract_name in key:
-                    return {
-                        "abi": value["abi"],
-                        "bytecode": value["bin"]
-                    }
-
-            raise ValueError(f"Contract {contract_name} not found in compilation output")
+            artifact = await self._artifact(source_code, artifact_id, optimizer_runs)
+            contract = find_contract(artifact, contract_name)
+            return {
+                "artifact_id": artifact["id"],
+                "abi": contract["abi"],
+                "bytecode": contract["evm"]["bytecode"]["object"]
+            }
 
+        except (CompilationError, ValueError):
+            raise
         except Exception as e:
             raise Exception(f"Compilation failed: {str(e)}")
 
-    async def deploy(
+    async def _artifact(
+        self,
+        source_code: Optional[str],
+        artifact_id: Optional[str],
+        optimizer_runs: Optional[int] = None
+    ) -> dict:
+        if artifact_id:
+            artifact = await compiler_service.get_artifact(artifact_id)
+            if artifact is None:
+                raise ValueError(f"Unknown or expired artifact ID: {artifact_id}")
+            return artifact
+        if source_code:
+            return await compiler_service.compile(source_code, optimizer_runs=optimizer_runs)
+        raise ValueError("Either source_code or artifact_id is required")
+
+    async def profile_gas(
+        self,
+        source_code: Optional[str],
+        contract_name: Optional[str] = None,
+        constructor_args: Optional[List] = None,
+        artifact_id: Optional[str] = None
+    ) -> dict:
+        """Deployment gas, code size and per-function gas from a local EVM, without any RPC.
+
+        Profiles ``contract_name``, or every deployable contract of the
+        source. ``constructor_args`` only apply with ``contract_name``;
+        otherwise every constructor gets sample arguments.
+        """
+
+        artifact = await self._artifact(source_code, artifact_id)
+        names = [contract_name] if contract_name else deployable_contracts(artifact)
+        contracts = {name: find_contract(artifact, name) for name in names}
+
+        args = {contract_name: constructor_args} if contract_name and constructor_args is not None else None
+        reports = await self.gas_profiler.profile(contracts, args)
+        return {"artifact_id": artifact["id"], "contracts": reports}
+
+    async def _preflight(self, chain: str, data: str, address: Optional[str] = None) -> dict:
+        """Chain ID check, pending nonce and gas estimate for a deployment in one JSON-RPC batch.
+
+        The chain ID is only asked for until the RPC has been verified to
+        serve the configured chain, and the pending nonce only when the nonce
+        manager needs a sync.
+        """
+
+        calls = {}
+        if chain not in self._verified_chains:
+            calls["chain_id"] = ("eth_chainId", [])
+        if address and self.nonces.needs_sync(chain, address):
+            calls["pending_nonce"] = ("eth_getTransactionCount", [address, "pending"])
+        calls["gas_estimate"] = ("eth_estimateGas", [{"data": data, **({"from": address} if address else {})}])
+
+        results = dict(zip(calls, await self.providers.batch(chain, list(calls.values()), hedge=True)))
+        for result in results.values():
+            if isinstance(result, Exception):
+                raise result
+
+        if "chain_id" in results:
+            chain_id = int(results["chain_id"], 16)
+            if chain_id != CHAINS[chain]["chain_id"]:
+                raise ValueError(
+                    f"{CHAINS[chain]['name']} RPC is on chain ID {chain_id}, expected {CHAINS[chain]['chain_id']}"
+                )
+            self._verified_chains.add(chain)
+
+        return {
+            "gas_estimate": int(results["gas_estimate"], 16),
+            "pending_nonce": int(results["pending_nonce"], 16) if "pending_nonce" in results else None
+        }
+
+    async def _send_deployment(
         self,
         chain: str,
-        source_code: str,
+        source_code: Optional[str],
         contract_name: str,
         constructor_args: List = None,
-        private_key: str = None
-    ) -> dict:
-        """Deploy contract to specified chain"""
+        private_key: str = None,
+        artifact_id: Optional[str] = None,
+        optimizer_runs: Optional[int] = None
+    ) -> Tuple[AsyncWeb3, HexBytes, dict]:
+        """Compile, sign and broadcast a deployment transaction; also returns the stage timings"""
 
-        if chain not in CHAINS:
-            raise ValueError(f"Unsupported chain: {chain}")
+        if not private_key:
+            raise ValueError("Private key is required for deployment")
 
+        w3 = await self.providers.get(chain)
         chain_config = CHAINS[chain]
-        w3 = Web3(Web3.HTTPProvider(chain_config["rpc"]))
-
-        if not w3.is_connected():
-            raise ConnectionError(f"Failed to connect to {chain_config['name']}")
+        account = w3.eth.account.from_key(private_key)
+        timings = {}
 
-        # Compile
-        compiled = self.compile_contract(source_code, contract_name)
+        # Compile while the fees are looked up (cached by the fee oracle)
+        started = time.perf_counter()
+        compiled, fees = await asyncio.gather(
+            self.compile_contract(source_code, contract_name, artifact_id, optimizer_runs),
+            self.fees.transaction_fees(chain)
+        )
+        timings["compile"] = elapsed_ms(started)
 
         # Create contract
         contract = w3.eth.contract(
             abi=compiled["abi"],
             bytecode=compiled["bytecode"]
         )
+        constructor = contract.constructor(*(constructor_args or []))
 
-        # Get account
-        if not private_key:
-            raise ValueError("Private key is required for deployment")
-
-        account = w3.eth.account.from_key(private_key)
+        started = time.perf_counter()
+        preflight = await self._preflight(chain, constructor.data_in_transaction, account.address)
+        timings["preflight"] = elapsed_ms(started)
 
         # Build transaction
-        constructor_txn = contract.constructor(
-            *(constructor_args or [])
-        ).build_transaction({
+        constructor_txn = await constructor.build_transaction({
             "from": account.address,
-            "nonce": w3.eth.get_transaction_count(account.address),
-            "gas": 3000000,
-            "gasPrice": w3.eth.gas_price,
+            "nonce": 0,  # Reserved below
+            "gas": gas_limit(preflight["gas_estimate"]),
+            "chainId": chain_config["chain_id"],
+            **fees
         })
 
-        # Sign and send transaction
-        signed_txn = account.sign_transaction(constructor_txn)
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        # Sign and send with a locally reserved nonce, resyncing on a nonce conflict
+        started = time.perf_counter()
+        signing = 0.0
+        pending_nonce = preflight["pending_nonce"]
+        for attempt in range(1, settings.NONCE_SEND_ATTEMPTS + 1):
+            try:
+                async with self.nonces.reserve(chain, account.address, pending_nonce) as nonce:
+                    signing_started = time.perf_counter()
+                    signed_txn = account.sign_transaction({**constructor_txn, "nonce": nonce})
+                    signing += time.perf_counter() - signing_started
+                    tx_hash = await w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+                break
+            except Exception as e:
+                if attempt == settings.NONCE_SEND_ATTEMPTS or not is_nonce_conflict(e):
+                    raise
+                pending_nonce = None  # Stale; read it again
+        timings["sign"] = round(signing * 1000, 1)
+        timings["broadcast"] = round(elapsed_ms(started) - timings["sign"], 1)
+
+        return w3, tx_hash, timings
+
+    async def deploy(
+        self,
+        chain: str,
+        source_code: Optional[str],
+        contract_name: str,
+        constructor_args: List = None,
+        private_key: str = None,
+        artifact_id: Optional[str] = None,
+        optimizer_runs: Optional[int] = None
+    ) -> dict:
+        """Deploy contract to specified chain"""
+
+        w3, tx_hash, timings = await self._send_deployment(
+            chain, source_code, contract_name, constructor_args, private_key, artifact_id, optimizer_runs
+        )
+        chain_config = CHAINS[chain]
 
-        # Wait for transaction receipt
-        tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        # Wait for transaction receipt (polled without blocking the event loop)
+        started = time.perf_counter()
+        tx_receipt = await w3.eth.wait_for_transaction_receipt(
+            tx_hash,
+            timeout=settings.DEPLOY_RECEIPT_TIMEOUT_SECONDS,
+            poll_latency=settings.DEPLOY_RECEIPT_POLL_SECONDS
+        )
+        timings["receipt"] = elapsed_ms(started)
 
         return {
             "tx_hash": tx_hash.hex(),
             "contract_address": tx_receipt.contractAddress,
             "chain": chain,
             "explorer_url": f"{chain_config['explorer']}/address/{tx_receipt.contractAddress}",
-            "status": "success" if tx_receipt.status == 1 else "failed"
+            "status": "success" if tx_receipt.status == 1 else "failed",
+            "timings_ms": timings
         }
 
-    async def estimate_deployment_gas(
+    async def submit_deployment(
         self,
         chain: str,
-        source_code: str,
+        source_code: Optional[str],
         contract_name: str,
-        constructor_args: List = None
+        constructor_args: List = None,
+        private_key: str = None,
+        artifact_id: Optional[str] = None,
+        optimizer_runs: Optional[int] = None
     ) -> dict:
-        """Estimate gas cost for deployment"""
+        """Broadcast a deployment and track its receipt in the background"""
 
-        if chain not in CHAINS:
-            raise ValueError(f"Unsupported chain: {chain}")
+        _, tx_hash, timings = await self._send_deployment(
+            chain, source_code, contract_name, constructor_args, private_key, artifact_id, optimizer_runs
+        )
+        return {**self.tracker.track(chain, Web3.to_hex(tx_hash), contract_name), "timings_ms": timings}
 
-        chain_config = CHAINS[chain]
-        w3 = Web3(Web3.HTTPProvider(chain_config["rpc"]))
+    async def deploy_to_chains(
+        self,
+        chains: List[str],
+        source_code: Optional[str],
+        contract_name: str,
+        constructor_args: List = None,
+        private_key: str = None,
+        artifact_id: Optional[str] = None,
+        optimizer_runs: Optional[int] = None
+    ) -> AsyncGenerator[dict, None]:
+        """Compile once and deploy to several chains concurrently.
+
+        Yields a "compiled" event, then each chain's events as they happen:
+        "submitted" once its transaction is broadcast, "status" for every
+        tracker update until it is confirmed or fails, or "error" if it could
+        not be submitted. Chains don't wait for each other.
+        """
+
+        chains = list(dict.fromkeys(chains))
+        if not chains:
+            raise ValueError("At least one chain is required")
+        unsupported = [chain for chain in chains if chain not in CHAINS]
+        if unsupported:
+            raise ValueError(f"Unsupported chain: {', '.join(unsupported)}")
+        if not private_key:
+            raise ValueError("Private key is required for deployment")
 
-        if not w3.is_connected():
-            raise ConnectionError(f"Failed to connect to {chain_config['name']}")
+        compiled = await self.compile_contract(source_code, contract_name, artifact_id, optimizer_runs)
+        yield {"event": "compiled", "artifact_id": compiled["artifact_id"]}
 
-        # Compile
-        compiled = self.compile_contract(source_code, contract_name)
+        queue = asyncio.Queue()
+        tasks = [
+            asyncio.create_task(self._deploy_and_follow(
+                queue, chain, contract_name, constructor_args, private_key, compiled["artifact_id"]
+            ))
+            for chain in chains
+        ]
+
+        try:
+            remaining = len(tasks)
+            while remaining:
+                event = await queue.get()
+                if event is None:
+                    remaining -= 1
+                else:
+                    yield event
+        finally:
+            # Client went away: stop following, the tracker keeps the deployments going
+            for task in tasks:
+                task.cancel()
+
+    async def _deploy_and_follow(
+        self,
+        queue: asyncio.Queue,
+        chain: str,
+        contract_name: str,
+        constructor_args: Optional[List],
+        private_key: str,
+        artifact_id: str
+    ) -> None:
+        try:
+            # Shielded so a disconnecting client can't cut a chain off mid-broadcast
+            deployment = await asyncio.shield(self.submit_deployment(
+                chain, None, contract_name, constructor_args, private_key, artifact_id
+            ))
+            queue.put_nowait({
+                "event": "submitted",
+                "chain": chain,
+                "deployment_id": deployment["id"],
+                "tx_hash": deployment["tx_hash"],
+                "explorer_url": deployment["explorer_url"],
+                "timings_ms": deployment["timings_ms"]
+            })
+
+            async with aclosing(self.tracker.events(deployment["id"])) as events:
+                async for event in events:
+                    queue.put_nowait({**event, "chain": chain, "deployment_id": deployment["id"]})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            queue.put_nowait({"event": "error", "chain": chain, "error": str(e)})
+        finally:
+            queue.put_nowait(None)
+
+    async def deploy_multi(
+        self,
+        chains: List[str],
+        source_code: Optional[str],
+        contract_name: str,
+        constructor_args: List = None,
+        private_key: str = None,
+        artifact_id: Optional[str] = None,
+        optimizer_runs: Optional[int] = None
+    ) -> dict:
+        """Deploy to several chains concurrently and return once every chain has a receipt or failed.
+
+        Waits at most ``DEPLOY_RECEIPT_TIMEOUT_SECONDS`` after compiling;
+        chains still pending then are returned as the tracker has them (with
+        ``timed_out`` set) so they can be followed at ``/deployments/{id}``.
+        """
+
+        results = {}
+        submitted = {}
+        timed_out = False
+        events = self.deploy_to_chains(
+            chains, source_code, contract_name, constructor_args, private_key, artifact_id, optimizer_runs
+        )
+        async with aclosing(events):
+            compiled = await anext(events)
+            try:
+                async with asyncio.timeout(settings.DEPLOY_RECEIPT_TIMEOUT_SECONDS):
+                    async for event in events:
+                        if event["event"] == "submitted":
+                            submitted[event["chain"]] = event["deployment_id"]
+                        elif event["event"] == "error":
+                            results[event["chain"]] = {
+                                "chain": event["chain"], "status": "failed", "error": event["error"]
+                            }
+                        elif event["event"] == "status" and (
+                            event["status"] == "mined" or event["status"] in TERMINAL_STATUSES
+                        ):
+                            results[event["chain"]] = self.tracker.get(event["deployment_id"])
+
+                        if len(results) == len(set(chains)):
+                            break
+            except TimeoutError:
+                timed_out = True
+
+        for chain in dict.fromkeys(chains):
+            if chain in results:
+                continue
+            if chain in submitted:
+                results[chain] = self.tracker.get(submitted[chain])
+            else:
+                # Still broadcasting; it carries on, but has no deployment ID yet
+                results[chain] = {"chain": chain, "id": None, "status": "submitting"}
+
+        return {"artifact_id": compiled["artifact_id"], "deployments": results, "timed_out": timed_out}
+
+    async def estimate_deployment_gas(
+        self,
+        chain: str,
+        source_code: Optional[str],
+        contract_name: str,
+        constructor_args: List = None,
+        artifact_id: Optional[str] = None,
+        optimizer_runs: Optional[int] = None
+    ) -> dict:
+        """Estimate gas cost for deployment"""
+
+        w3 = await self.providers.get(chain)
+        timings = {}
+
+        # Compile while the fees are looked up (cached by the fee oracle)
+        started = time.perf_counter()
+        compiled, fees = await asyncio.gather(
+            self.compile_contract(source_code, contract_name, artifact_id, optimizer_runs),
+            self.fees.fees(chain)
+        )
+        timings["compile"] = elapsed_ms(started)
 
         # Create contract
         contract = w3.eth.contract(
@@ -181,21 +477,34 @@ class DeploymentService:
         )
 
         # Estimate gas
-        gas_estimate = contract.constructor(
-            *(constructor_args or [])
-        ).estimate_gas()
+        started = time.perf_counter()
+        preflight = await self._preflight(chain, contract.constructor(*(constructor_args or [])).data_in_transaction)
+        timings["preflight"] = elapsed_ms(started)
+        gas_estimate = preflight["gas_estimate"]
 
-        gas_price = w3.eth.gas_price
+        gas_price = expected_gas_price(fees)
         total_cost_wei = gas_estimate * gas_price
         total_cost_eth = w3.from_wei(total_cost_wei, 'ether')
 
         return {
             "gas_estimate": gas_estimate,
+            "gas_limit": gas_limit(gas_estimate),
             "gas_price_gwei": w3.from_wei(gas_price, 'gwei'),
+            "eip1559": fees["eip1559"],
             "total_cost_wei": total_cost_wei,
             "total_cost_eth": float(total_cost_eth),
-            "chain": chain
+            "chain": chain,
+            "timings_ms": timings
         }
 
 
+def elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def gas_limit(gas_estimate: int) -> int:
+    """Gas limit for a transaction, with headroom over its estimate"""
+    return int(gas_estimate * settings.DEPLOY_GAS_LIMIT_MULTIPLIER)
+
+
 deployment_service = DeploymentService()
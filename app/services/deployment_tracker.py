@@ -0,0 +1,196 @@
+import asyncio
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import AsyncGenerator, List, Optional
+
+from web3 import Web3
+
+from app.config import settings
+from app.services.events import EventHub
+from app.services.rpc import ProviderRegistry
+
+TERMINAL_STATUSES = {"confirmed", "failed"}
+
+
+class DeploymentTracker:
+    """Follows submitted deployment transactions until they are confirmed or fail.
+
+    One background loop polls every pending deployment, sending a single
+    batched JSON-RPC request per chain per round (the chain head plus each
+    pending receipt), and publishes status changes to subscribers. The loop
+    only runs while something is pending.
+    """
+
+    def __init__(self, providers: ProviderRegistry, chains: dict):
+        self.providers = providers
+        self.chains = chains
+        self._deployments = {}
+        self._submitted = {}
+        self._missing = {}  # Consecutive polls a mined deployment's receipt was missing
+        self._history = {}
+        self._expires = {}
+        self._hub = EventHub()
+        self._poller: Optional[asyncio.Task] = None
+
+    def track(self, chain: str, tx_hash: str, contract_name: str) -> dict:
+        """Start tracking a sent deployment transaction"""
+
+        now = datetime.now().isoformat()
+        deployment = {
+            "id": uuid.uuid4().hex,
+            "chain": chain,
+            "contract_name": contract_name,
+            "tx_hash": tx_hash,
+            "status": "pending",
+            "contract_address": None,
+            "block_number": None,
+            "confirmations": 0,
+            "required_confirmations": settings.DEPLOY_CONFIRMATION_BLOCKS,
+            "explorer_url": f"{self.chains[chain]['explorer']}/tx/{tx_hash}",
+            "error": None,
+            "submitted_at": now,
+            "updated_at": now
+        }
+        self._purge()
+        self._deployments[deployment["id"]] = deployment
+        self._submitted[deployment["id"]] = time.monotonic()
+        self._publish(deployment)
+
+        if self._poller is None:
+            self._poller = asyncio.create_task(self._poll())
+        return dict(deployment)
+
+    def get(self, deployment_id: str) -> Optional[dict]:
+        deployment = self._deployments.get(deployment_id)
+        return dict(deployment) if deployment else None
+
+    async def events(self, deployment_id: str) -> AsyncGenerator[dict, None]:
+        """Status events for a deployment, ending once it is confirmed or failed"""
+
+        queue = self._hub.subscribe(deployment_id)
+        try:
+            last_seq = 0
+            events = list(self._history.get(deployment_id, []))
+            while True:
+                for event in events:
+                    if event["seq"] <= last_seq:
+                        continue
+                    last_seq = event["seq"]
+                    yield event
+                    if event["status"] in TERMINAL_STATUSES:
+                        return
+                events = [await queue.get()]
+        finally:
+            self._hub.unsubscribe(deployment_id, queue)
+
+    def _publish(self, deployment: dict) -> None:
+        history = self._history.setdefault(deployment["id"], [])
+        event = {
+            "event": "status",
+            "seq": len(history) + 1,
+            **{key: deployment[key] for key in (
+                "status", "confirmations", "block_number", "contract_address", "error", "updated_at"
+            )}
+        }
+        history.append(event)
+        self._hub.publish(deployment["id"], event)
+
+        if deployment["status"] in TERMINAL_STATUSES:
+            self._expires[deployment["id"]] = time.monotonic() + settings.DEPLOYMENT_RECORD_TTL_SECONDS
+
+    def _purge(self) -> None:
+        now = time.monotonic()
+        for deployment_id in [d for d, expires in self._expires.items() if expires <= now]:
+            del self._expires[deployment_id]
+            self._deployments.pop(deployment_id, None)
+            self._submitted.pop(deployment_id, None)
+            self._missing.pop(deployment_id, None)
+            self._history.pop(deployment_id, None)
+
+    async def _poll(self) -> None:
+        try:
+            while True:
+                pending = defaultdict(list)
+                for deployment in self._deployments.values():
+                    if deployment["status"] not in TERMINAL_STATUSES:
+                        pending[deployment["chain"]].append(deployment)
+                if not pending:
+                    return
+
+                await asyncio.gather(*(
+                    self._poll_chain(chain, deployments) for chain, deployments in pending.items()
+                ))
+                await asyncio.sleep(settings.DEPLOY_TRACKER_POLL_SECONDS)
+        finally:
+            self._poller = None
+
+    async def _poll_chain(self, chain: str, deployments: List[dict]) -> None:
+        calls = [("eth_blockNumber", [])]
+        calls += [("eth_getTransactionReceipt", [d["tx_hash"]]) for d in deployments]
+        try:
+            results = await self.providers.batch(chain, calls)
+        except Exception:
+            results = None  # RPC unreachable this round; retry on the next one
+
+        if not results or not isinstance(results[0], str):
+            for deployment in deployments:
+                if deployment["status"] == "pending":
+                    self._apply_receipt(deployment, None, None)
+            return
+
+        head = int(results[0], 16)
+        for deployment, receipt in zip(deployments, results[1:]):
+            if isinstance(receipt, Exception):
+                continue
+            try:
+                self._apply_receipt(deployment, receipt, head)
+            except (KeyError, TypeError, ValueError):
+                continue  # Malformed receipt; look again next round
+
+    def _apply_receipt(self, deployment: dict, receipt: Optional[dict], head: Optional[int]) -> None:
+        changes = {}
+
+        if receipt is None:
+            if deployment["status"] == "mined":
+                # A node behind the recorded block, or one lagging replica
+                # answering a poll, may just not have the receipt yet; only
+                # repeated misses at or past its block mean a reorg removed it
+                if head is not None and head >= deployment["block_number"]:
+                    self._missing[deployment["id"]] = self._missing.get(deployment["id"], 0) + 1
+                if self._missing.get(deployment["id"], 0) >= settings.DEPLOY_REORG_MISSING_POLLS:
+                    # Mined block was reorganized away; the tx is back in the mempool
+                    self._missing.pop(deployment["id"])
+                    changes = {"status": "pending", "block_number": None, "confirmations": 0}
+            elif time.monotonic() - self._submitted[deployment["id"]] > settings.DEPLOY_TRACK_TIMEOUT_SECONDS:
+                changes = {
+                    "status": "failed",
+                    "error": f"Not mined within {settings.DEPLOY_TRACK_TIMEOUT_SECONDS} seconds"
+                }
+        elif int(receipt.get("status", "0x1"), 16) == 0:
+            changes = {
+                "status": "failed",
+                "block_number": int(receipt["blockNumber"], 16),
+                "error": "Deployment transaction reverted"
+            }
+        else:
+            self._missing.pop(deployment["id"], None)
+            block_number = int(receipt["blockNumber"], 16)
+            contract_address = receipt.get("contractAddress")
+            confirmations = max(0, head - block_number + 1)
+            changes = {
+                "status": "confirmed" if confirmations >= deployment["required_confirmations"] else "mined",
+                "contract_address": Web3.to_checksum_address(contract_address) if contract_address else None,
+                "block_number": block_number,
+                "confirmations": confirmations
+            }
+
+        if any(deployment[key] != value for key, value in changes.items()):
+            deployment.update(changes, updated_at=datetime.now().isoformat())
+            self._publish(deployment)
+
+    async def shutdown(self) -> None:
+        if self._poller is not None:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
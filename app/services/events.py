@@ -0,0 +1,26 @@
+import asyncio
+from collections import defaultdict
+
+
+class EventHub:
+    """In-process publish/subscribe keyed by topic (job ID, deployment ID...)"""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+
+    def publish(self, topic: str, event: dict) -> None:
+        for queue in self._subscribers.get(topic, ()):
+            queue.put_nowait(event)
+
+    def subscribe(self, topic: str) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        self._subscribers[topic].add(queue)
+        return queue
+
+    def unsubscribe(self, topic: str, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(topic)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[topic]
@@ -0,0 +1,125 @@
+import asyncio
+import statistics
+import time
+from datetime import datetime
+from typing import Dict
+
+from app.config import settings
+from app.services.rpc import ProviderRegistry, RPCError
+
+# eth_feeHistory reward percentiles behind each priority fee level
+FEE_PERCENTILES = {"slow": 10, "standard": 50, "fast": 90}
+
+
+class FeeOracle:
+    """Per-chain fee data, cached and refreshed in the background.
+
+    One batched request (eth_feeHistory plus eth_gasPrice) fetches the next
+    block's base fee, priority fee percentiles over recent blocks and the
+    legacy gas price. Once a chain has been asked for, it is refreshed every
+    ``fee_ttl`` seconds (from CHAINS) until it goes unused, so requests are
+    served from memory instead of paying an RPC round trip each.
+    """
+
+    def __init__(self, providers: ProviderRegistry, chains: dict):
+        self.providers = providers
+        self.chains = chains
+        self._fees: Dict[str, dict] = {}
+        self._fetched: Dict[str, float] = {}
+        self._last_used: Dict[str, float] = {}
+        self._fetches: Dict[str, asyncio.Task] = {}
+        self._refreshers: Dict[str, asyncio.Task] = {}
+
+    async def fees(self, chain: str) -> dict:
+        """Latest fee data for a chain; only fetched in the request path when missing or stale"""
+
+        self._last_used[chain] = time.monotonic()
+        if chain not in self._refreshers:
+            self._refreshers[chain] = asyncio.create_task(self._keep_fresh(chain))
+
+        if chain not in self._fees or time.monotonic() - self._fetched[chain] > settings.FEE_ORACLE_MAX_STALE_SECONDS:
+            await self._refresh(chain)
+        return self._fees[chain]
+
+    async def transaction_fees(self, chain: str, speed: str = "standard") -> dict:
+        """Fee fields for a transaction: EIP-1559 where the chain supports it, legacy gasPrice otherwise"""
+
+        fees = await self.fees(chain)
+        if not fees["eip1559"]:
+            return {"gasPrice": fees["gas_price"]}
+
+        priority_fee = fees["priority_fees"][speed]
+        return {
+            # Room for the base fee to double before the transaction is priced out
+            "maxFeePerGas": 2 * fees["base_fee"] + priority_fee,
+            "maxPriorityFeePerGas": priority_fee
+        }
+
+    async def _keep_fresh(self, chain: str) -> None:
+        ttl = self.chains[chain].get("fee_ttl", settings.FEE_ORACLE_TTL_SECONDS)
+        try:
+            while time.monotonic() - self._last_used[chain] < settings.FEE_ORACLE_IDLE_SECONDS:
+                await asyncio.sleep(ttl)
+                try:
+                    await self._refresh(chain)
+                except Exception:
+                    pass  # Keep serving the last values; requests refetch once they are too stale
+        finally:
+            self._refreshers.pop(chain, None)
+
+    async def _refresh(self, chain: str) -> None:
+        task = self._fetches.get(chain)
+        if task is None:
+            task = asyncio.create_task(self._fetch(chain))
+            self._fetches[chain] = task
+            task.add_done_callback(lambda _: self._fetches.pop(chain, None))
+        await asyncio.shield(task)
+
+    async def _fetch(self, chain: str) -> None:
+        history, gas_price = await self.providers.batch(chain, [
+            ("eth_feeHistory", [hex(settings.FEE_HISTORY_BLOCKS), "latest", list(FEE_PERCENTILES.values())]),
+            ("eth_gasPrice", [])
+        ])
+        if isinstance(gas_price, Exception):
+            raise gas_price
+        if not isinstance(gas_price, str):
+            raise RPCError({"message": f"Invalid eth_gasPrice result: {gas_price!r}"})
+
+        fees = {
+            "eip1559": False,
+            "base_fee": None,
+            "priority_fees": None,
+            "gas_price": int(gas_price, 16),
+            "updated_at": datetime.now().isoformat()
+        }
+
+        # Chains (or nodes) without EIP-1559 reject eth_feeHistory or report no base fee
+        if isinstance(history, dict) and history.get("baseFeePerGas"):
+            base_fee = int(history["baseFeePerGas"][-1], 16)  # The pending block's
+            rewards = [block for block in history.get("reward") or [] if len(block) == len(FEE_PERCENTILES)]
+            if rewards:
+                priority_fees = {
+                    speed: statistics.median_low(int(block[i], 16) for block in rewards)
+                    for i, speed in enumerate(FEE_PERCENTILES)
+                }
+            else:
+                tip = max(fees["gas_price"] - base_fee, 0)
+                priority_fees = {speed: tip for speed in FEE_PERCENTILES}
+            fees.update(eip1559=True, base_fee=base_fee, priority_fees=priority_fees)
+
+        self._fees[chain] = fees
+        self._fetched[chain] = time.monotonic()
+
+    async def shutdown(self) -> None:
+        tasks = list(self._refreshers.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def expected_gas_price(fees: dict, speed: str = "standard") -> int:
+    """Price per gas a transaction is expected to actually pay"""
+
+    if not fees["eip1559"]:
+        return fees["gas_price"]
+    return fees["base_fee"] + fees["priority_fees"][speed]
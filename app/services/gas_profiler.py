@@ -0,0 +1,199 @@
+import asyncio
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+from app.services.processes import spawn_context
+
+MAX_RUNTIME_SIZE = 24576  # EIP-170 deployed code limit
+MAX_INITCODE_SIZE = 49152  # EIP-3860 creation code limit
+PROFILE_GAS_LIMIT = 25_000_000
+
+# In-process chain of this worker: (tester, web3, snapshot taken at genesis)
+_chain = None
+
+
+def gas_profiler_available() -> bool:
+    return importlib.util.find_spec("eth_tester") is not None and importlib.util.find_spec("eth") is not None
+
+
+def _init_worker() -> None:
+    """Create the worker's chain once; each profile starts from its genesis snapshot"""
+
+    global _chain
+    from eth_tester import EthereumTester, PyEVMBackend
+    from web3 import EthereumTesterProvider, Web3
+
+    tester = EthereumTester(PyEVMBackend())
+    _chain = (tester, Web3(EthereumTesterProvider(tester)), tester.take_snapshot())
+
+
+def _profile_contract(job: dict) -> dict:
+    """Deploy one contract locally and measure its deployment and function gas"""
+
+    tester, w3, genesis = _chain
+    tester.revert_to_snapshot(genesis)
+    deployer, other = w3.eth.accounts[:2]
+
+    bytecode = job["bytecode"]
+    report = {
+        "runtime_size": len(job["runtime_bytecode"]) // 2,
+        "runtime_size_limit": MAX_RUNTIME_SIZE,
+        "initcode_size": len(bytecode) // 2,
+        "initcode_size_limit": MAX_INITCODE_SIZE,
+        "deployment_gas": None,
+        "sampled_constructor_args": False,
+        "functions": {},
+        "error": None
+    }
+    if not bytecode:
+        report["error"] = "Abstract contract or interface; nothing to deploy"
+        return report
+    if "__$" in bytecode:
+        report["error"] = "Bytecode references external libraries that need linking"
+        return report
+
+    abi = job["abi"]
+    args = job["constructor_args"]
+    transaction = {"from": deployer, "gas": PROFILE_GAS_LIMIT}
+    try:
+        if args is None:
+            constructor = next((entry for entry in abi if entry["type"] == "constructor"), {})
+            args = [sample_value(param, other) for param in constructor.get("inputs", [])]
+            report["sampled_constructor_args"] = bool(args)
+        tx_hash = w3.eth.contract(abi=abi, bytecode=bytecode).constructor(*args).transact(transaction)
+        receipt = w3.eth.get_transaction_receipt(tx_hash)
+    except Exception as e:
+        report["error"] = f"Deployment failed: {e}"
+        return report
+    if receipt.status != 1:
+        report["error"] = "Deployment reverted"
+        return report
+
+    report["deployment_gas"] = receipt.gasUsed
+    contract = w3.eth.contract(address=receipt.contractAddress, abi=abi)
+    deployed = tester.take_snapshot()
+
+    # Every function is measured against the freshly deployed state
+    for entry in abi:
+        if entry["type"] != "function":
+            continue
+
+        signature = f"{entry['name']}({','.join(canonical_type(param) for param in entry.get('inputs', []))})"
+        mutability = entry.get("stateMutability", "nonpayable")
+        try:
+            call = contract.get_function_by_signature(signature)(
+                *[sample_value(param, other) for param in entry.get("inputs", [])]
+            )
+            # Sent as a transaction even for views: eth-tester pads its gas estimates
+            receipt = w3.eth.get_transaction_receipt(call.transact(transaction))
+            if receipt.status != 1:
+                raise ValueError("Call reverted")
+            gas = receipt.gasUsed
+            report["functions"][signature] = {"gas": gas, "state_mutability": mutability, "error": None}
+        except Exception as e:
+            report["functions"][signature] = {"gas": None, "state_mutability": mutability, "error": str(e)}
+        tester.revert_to_snapshot(deployed)
+
+    return report
+
+
+def canonical_type(param: dict) -> str:
+    """ABI type as it appears in a function signature, with tuples expanded"""
+
+    abi_type = param["type"]
+    if abi_type.startswith("tuple"):
+        return f"({','.join(canonical_type(c) for c in param['components'])}){abi_type[len('tuple'):]}"
+    return abi_type
+
+
+def sample_value(param: dict, address: str):
+    """A plausible argument for an ABI parameter: 1, true, a funded account, one-element arrays..."""
+
+    abi_type = param["type"]
+    if abi_type.endswith("]"):
+        base, _, size = abi_type[:-1].rpartition("[")
+        item = sample_value({**param, "type": base}, address)
+        return [item] * (int(size) if size else 1)
+    if abi_type == "tuple":
+        return tuple(sample_value(component, address) for component in param["components"])
+    if abi_type.startswith(("uint", "int")):
+        return 1
+    if abi_type == "address":
+        return address
+    if abi_type == "bool":
+        return True
+    if abi_type == "string":
+        return "sample"
+    if abi_type == "bytes":
+        return b"\x01"
+    if abi_type.startswith("bytes"):
+        return b"\x01" * int(abi_type[len("bytes"):])
+    raise ValueError(f"No sample value for ABI type {abi_type}")
+
+
+class GasProfiler:
+    """Gas numbers from an in-process EVM instead of a live RPC.
+
+    Compiled contracts are deployed to an eth-tester (py-evm) chain to
+    measure deployment gas, and every ABI function is then called with
+    sample arguments from the deployer's account to measure its gas.
+    Contracts are profiled in parallel in a pool of worker processes, each
+    keeping its own chain and resetting it to genesis between contracts.
+    Nothing touches the network.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def enabled(self) -> bool:
+        return gas_profiler_available()
+
+    async def profile(
+        self,
+        contracts: Dict[str, dict],
+        constructor_args: Optional[Dict[str, List]] = None
+    ) -> Dict[str, dict]:
+        """Gas report per contract, from each contract's compiled output.
+
+        ``constructor_args`` maps contract names to their constructor
+        arguments; contracts without an entry get sample arguments generated
+        from their constructor's ABI.
+        """
+
+        if not self.enabled:
+            raise RuntimeError(
+                'Gas profiling requires eth-tester with py-evm. Install with: pip install "eth-tester[py-evm]"'
+            )
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=spawn_context, initializer=_init_worker
+            )
+
+        loop = asyncio.get_running_loop()
+        jobs = [
+            {
+                "abi": contract["abi"],
+                "bytecode": contract["evm"]["bytecode"]["object"],
+                "runtime_bytecode": contract["evm"]["deployedBytecode"]["object"],
+                "constructor_args": (constructor_args or {}).get(name)
+            }
+            for name, contract in contracts.items()
+        ]
+        try:
+            reports = await asyncio.gather(*(
+                loop.run_in_executor(self._executor, _profile_contract, job) for job in jobs
+            ))
+        except BrokenProcessPool:
+            self.shutdown()  # A worker died (e.g. out of memory); start a fresh pool next time
+            raise RuntimeError("Gas profiler worker crashed")
+        return dict(zip(contracts, reports))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,161 @@
+import json
+import posixpath
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from app.config import settings
+from app.services.solidity_rules import PRAGMA_RE, blank_comments_and_strings
+
+IMPORT_RE = re.compile(r"\bimport\b[^;]*;")
+IMPORT_PATH_RE = re.compile(r"([\"'])(.*?)\1")
+
+
+class ImportResolutionError(Exception):
+    """Raised when an import cannot be mapped to a local library file"""
+
+
+@dataclass
+class SourceUnit:
+    """A library file with its imports and pragmas already parsed"""
+
+    content: str
+    imports: List[str]
+    pragmas: List[str]
+
+
+@dataclass
+class ResolvedImports:
+    """Everything a source pulls in through its imports"""
+
+    sources: Dict[str, str] = field(default_factory=dict)  # Source unit name -> content
+    libraries: List[str] = field(default_factory=list)  # "name@version" of each library used
+    pragmas: List[str] = field(default_factory=list)  # Version constraints of the dependencies
+
+
+class ImportResolver:
+    """Resolves library imports (``@openzeppelin/...``) to local files.
+
+    Import paths are mapped to directories through SOLIDITY_REMAPPINGS and
+    the whole dependency tree is handed to solc as sources, so compilation
+    needs no network or include paths. Library files are read and parsed
+    once and kept in memory per library version (from the package.json next
+    to them), so compiling a source that imports a library only parses the
+    source itself.
+    """
+
+    def __init__(self, remappings: str):
+        self.remappings = parse_remappings(remappings)
+        self._units: Dict[str, Dict[str, SourceUnit]] = {}
+        self._package_roots: Dict[Path, Path] = {}
+
+    def resolve(self, filename: str, source_code: str) -> ResolvedImports:
+        """Library sources imported, directly or not, by ``source_code``"""
+
+        resolved = ResolvedImports()
+        libraries: Dict[Path, str] = {}
+        pending = [unit_name(filename, path) for path in import_paths(source_code)]
+
+        while pending:
+            name = pending.pop()
+            if name == filename or name in resolved.sources:
+                continue
+
+            unit = self._load(name, libraries)
+            resolved.sources[name] = unit.content
+            resolved.pragmas.extend(unit.pragmas)
+            pending.extend(unit_name(name, path) for path in unit.imports)
+
+        resolved.libraries = sorted(set(libraries.values()))
+        return resolved
+
+    def _load(self, name: str, libraries: Dict[Path, str]) -> SourceUnit:
+        path, root = self._locate(name)
+
+        package_root = self._package_root(path.parent, root)
+        if package_root not in libraries:
+            libraries[package_root] = library_version(package_root)
+        units = self._units.setdefault(libraries[package_root], {})
+
+        unit = units.get(name)
+        if unit is None:
+            try:
+                content = path.read_text()
+            except OSError:
+                raise ImportResolutionError(f'Cannot resolve import "{name}": {path} not found')
+            unit = SourceUnit(
+                content=content,
+                imports=import_paths(content),
+                pragmas=[m.group(1).strip() for m in PRAGMA_RE.finditer(blank_comments_and_strings(content))]
+            )
+            units[name] = unit
+        return unit
+
+    def _locate(self, name: str) -> Tuple[Path, Path]:
+        if ".." not in name.split("/"):
+            for prefix, directory in self.remappings:
+                if name.startswith(prefix):
+                    return directory / name[len(prefix):], directory
+
+        prefixes = ", ".join(prefix for prefix, _ in self.remappings) or "none configured"
+        raise ImportResolutionError(
+            f'Cannot resolve import "{name}"; only library imports are available ({prefixes})'
+        )
+
+    def _package_root(self, directory: Path, root: Path) -> Path:
+        """Nearest directory at or above ``directory`` with a package.json, else the remapping root"""
+
+        if directory not in self._package_roots:
+            package_root = None
+            for candidate in [directory, *directory.parents]:
+                if (candidate / "package.json").is_file():
+                    package_root = candidate
+                    break
+                if candidate == root:
+                    break
+            self._package_roots[directory] = package_root or root
+        return self._package_roots[directory]
+
+
+def parse_remappings(remappings: str) -> List[Tuple[str, Path]]:
+    """``prefix=directory`` pairs, longest prefix first"""
+
+    pairs = []
+    for remapping in remappings.split(","):
+        prefix, _, directory = remapping.strip().partition("=")
+        if prefix and directory:
+            pairs.append((prefix, Path(directory).resolve()))
+    return sorted(pairs, key=lambda pair: len(pair[0]), reverse=True)
+
+
+def import_paths(source_code: str) -> List[str]:
+    """Paths named by the import directives of a source"""
+
+    paths = []
+    for match in IMPORT_RE.finditer(blank_comments_and_strings(source_code)):
+        path = IMPORT_PATH_RE.search(source_code, match.start(), match.end())
+        if path:
+            paths.append(path.group(2))
+    return paths
+
+
+def unit_name(importer: str, path: str) -> str:
+    """Source unit name solc gives an import, relative ones resolved against the importer"""
+
+    if path.startswith(("./", "../")):
+        return posixpath.normpath(posixpath.join(posixpath.dirname(importer), path))
+    return path
+
+
+def library_version(package_root: Path) -> str:
+    """``name@version`` from a library's package.json; unversioned copies are keyed by path"""
+
+    try:
+        package = json.loads((package_root / "package.json").read_text())
+        return f"{package['name']}@{package['version']}"
+    except (OSError, ValueError, KeyError, TypeError):
+        return str(package_root)
+
+
+import_resolver = ImportResolver(settings.SOLIDITY_REMAPPINGS)
@@ -0,0 +1,111 @@
+import asyncio
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
+
+from app.config import settings
+from app.services.rpc import ProviderRegistry
+
+NONCE_CONFLICT_RE = re.compile(
+    r"nonce (is )?too (low|high)|invalid (transaction )?nonce|oldnonce|already (known|imported)"
+    r"|known transaction|replacement transaction underpriced",
+    re.IGNORECASE
+)
+
+
+def is_nonce_conflict(error: BaseException) -> bool:
+    """Whether a node rejected a transaction because its nonce is taken or out of line"""
+    return bool(NONCE_CONFLICT_RE.search(str(error)))
+
+
+class AccountNonces:
+    """Nonce bookkeeping for one account on one chain"""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.next: Optional[int] = None  # None = read the pending count before the next reservation
+        self.released: Set[int] = set()  # Handed back below ``next``; reused first to close the gap
+        self.in_flight: Set[int] = set()  # Reserved, transaction not sent yet
+        self.last_used = 0.0
+
+
+class NonceManager:
+    """Hands out nonces per (chain, address) without a round trip per transaction.
+
+    The account's pending transaction count is read once, then nonces are
+    reserved locally, so concurrent transactions from one key go out back to
+    back instead of racing for the same nonce. A nonce whose transaction
+    could not be sent is handed back and reused before any new one, so later
+    transactions don't queue behind a gap. When the node reports a nonce
+    conflict (the key was used elsewhere, or a transaction with that nonce
+    is already pending), the account resyncs with the node.
+    """
+
+    def __init__(self, providers: ProviderRegistry):
+        self.providers = providers
+        self._accounts: Dict[Tuple[str, str], AccountNonces] = {}
+
+    def needs_sync(self, chain: str, address: str) -> bool:
+        """Whether the next reservation has to read the account's pending count"""
+
+        account = self._accounts.get((chain, address))
+        return account is None or self._stale(account)
+
+    @asynccontextmanager
+    async def reserve(self, chain: str, address: str, pending: Optional[int] = None) -> AsyncIterator[int]:
+        """Reserve the account's next nonce while its transaction is signed and sent.
+
+        ``pending`` is a pending count the caller just read (e.g. in a
+        batch), used instead of reading it again if the account needs a sync.
+        """
+
+        account = self._accounts.setdefault((chain, address), AccountNonces())
+        async with account.lock:
+            if self._stale(account):
+                await self._sync(chain, address, account, pending)
+
+            if account.released:
+                nonce = min(account.released)
+                account.released.remove(nonce)
+            else:
+                nonce = account.next
+                account.next += 1
+            account.in_flight.add(nonce)
+            account.last_used = time.monotonic()
+
+        try:
+            yield nonce
+        except BaseException as e:
+            account.in_flight.discard(nonce)
+            if is_nonce_conflict(e):
+                account.next = None
+            else:
+                self._release(account, nonce)
+            raise
+        account.in_flight.discard(nonce)
+
+    def _stale(self, account: AccountNonces) -> bool:
+        idle = not account.in_flight and time.monotonic() - account.last_used > settings.NONCE_IDLE_RESYNC_SECONDS
+        return account.next is None or idle
+
+    async def _sync(self, chain: str, address: str, account: AccountNonces, pending: Optional[int]) -> None:
+        if pending is None:
+            w3 = await self.providers.get(chain)
+            pending = await w3.eth.get_transaction_count(address, "pending")
+
+        # Nonces still being sent stay reserved; free ones between them are gaps to fill
+        account.next = max([pending] + [nonce + 1 for nonce in account.in_flight])
+        account.released = {
+            nonce for nonce in range(pending, account.next) if nonce not in account.in_flight
+        }
+
+    def _release(self, account: AccountNonces, nonce: int) -> None:
+        if account.next is None:
+            return  # Resync pending; it recomputes the gaps
+
+        account.released.add(nonce)
+        while account.next - 1 in account.released:
+            account.next -= 1
+            account.released.remove(account.next)
+
@@ -0,0 +1,6 @@
+import multiprocessing
+
+# Worker processes are spawned (not forked) so they don't inherit the event
+# loop, sockets or threads of the API process. This module is imported by
+# spawned children, so it must not import app.config or other services.
+spawn_context = multiprocessing.get_context("spawn")
@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+
+def normalize_source(source: str) -> str:
+    """Normalize line endings and trailing whitespace so cosmetic edits share a key.
+
+    Line numbers are preserved, so it may key results reported by line
+    (audits) but not results that depend on the exact bytes (compilation).
+    """
+
+    lines = source.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).rstrip("\n")
+
+
+def source_hash(source: str) -> str:
+    return hashlib.sha256(normalize_source(source).encode()).hexdigest()
+
+
+def exact_source_hash(source: str) -> str:
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def cache_key(*parts: str) -> str:
+    """Content-addressed key from a list of components (source hash, tool, versions...)"""
+    return hashlib.sha256("\x00".join(parts).encode()).hexdigest()
+
+
+class ResultCache:
+    """Two-tier cache for JSON results: an in-memory LRU in front of a size-bounded disk store.
+
+    Disk entries are evicted least-recently-used first once the directory grows
+    past ``disk_max_bytes``. Concurrent lookups of a key that is being computed
+    wait for the running computation instead of starting another one.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        memory_entries: int,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 0
+    ):
+        self.name = name
+        self.memory_entries = memory_entries
+        self.disk_dir = Path(disk_dir) if disk_dir and disk_max_bytes > 0 else None
+        self.disk_max_bytes = disk_max_bytes
+
+        self._memory: OrderedDict = OrderedDict()
+        self._disk_index: Optional[OrderedDict] = None  # key -> size, oldest first
+        self._disk_bytes = 0
+        self._inflight: dict = {}
+        self._disk_lock = threading.Lock()
+
+        self.hits = {"memory": 0, "disk": 0, "inflight": 0}
+        self.misses = 0
+        self.evictions = {"memory": 0, "disk": 0}
+
+    async def get(self, key: str) -> Optional[dict]:
+        value = await self._lookup(key)
+        if value is None:
+            self.misses += 1
+        return value
+
+    async def _lookup(self, key: str) -> Optional[dict]:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits["memory"] += 1
+            return self._memory[key]
+
+        if self.disk_dir is not None:
+            value = await asyncio.to_thread(self._disk_get, key)
+            if value is not None:
+                self.hits["disk"] += 1
+                self._memory_put(key, value)
+                return value
+
+        return None
+
+    async def contains(self, key: str) -> bool:
+        """Whether ``key`` is cached, without touching counters or recency"""
+
+        if key in self._memory:
+            return True
+        if self.disk_dir is None:
+            return False
+        return await asyncio.to_thread(self._disk_contains, key)
+
+    async def put(self, key: str, value: dict) -> None:
+        self._memory_put(key, value)
+        if self.disk_dir is not None:
+            await asyncio.to_thread(self._disk_put, key, value)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[dict]],
+        cacheable: Callable[[dict], bool] = lambda value: True
+    ) -> dict:
+        """Return the cached value for ``key`` or compute, store and return it"""
+
+        cached = await self._lookup(key)
+        if cached is not None:
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.hits["inflight"] += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The computing request was cancelled; take over
+                return await self.get_or_compute(key, compute, cacheable)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+            if cacheable(value):
+                await self.put(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; don't warn about an unretrieved exception
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    def _memory_put(self, key: str, value: dict) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.evictions["memory"] += 1
+
+    def _path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _load_disk_index(self) -> None:
+        entries = []
+        for path in self.disk_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+
+        self._disk_index = OrderedDict((key, size) for _, key, size in sorted(entries))
+        self._disk_bytes = sum(self._disk_index.values())
+
+    def _disk_get(self, key: str) -> Optional[dict]:
+        with self._disk_lock:
+            return self._disk_get_locked(key)
+
+    def _disk_put(self, key: str, value: dict) -> None:
+        with self._disk_lock:
+            self._disk_put_locked(key, value)
+
+    def _disk_contains(self, key: str) -> bool:
+        with self._disk_lock:
+            if self._disk_index is None:
+                self._load_disk_index()
+            return key in self._disk_index
+
+    def _disk_get_locked(self, key: str) -> Optional[dict]:
+        if self._disk_index is None:
+            self._load_disk_index()
+        if key not in self._disk_index:
+            return None
+
+        path = self._path(key)
+        try:
+            value = json.loads(path.read_text())
+            os.utime(path)  # Mark as recently used
+        except (OSError, ValueError):
+            self._disk_remove(key)
+            return None
+
+        self._disk_index.move_to_end(key)
+        return value
+
+    def _disk_put_locked(self, key: str, value: dict) -> None:
+        if self._disk_index is None:
+            self._load_disk_index()
+
+        data = json.dumps(value)
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(data)
+        tmp_path.replace(path)
+
+        self._disk_bytes -= self._disk_index.pop(key, 0)
+        size = path.stat().st_size
+        self._disk_index[key] = size
+        self._disk_bytes += size
+
+        while self._disk_bytes > self.disk_max_bytes and len(self._disk_index) > 1:
+            oldest = next(iter(self._disk_index))
+            self._disk_remove(oldest)
+            self.evictions["disk"] += 1
+
+    def _disk_remove(self, key: str) -> None:
+        self._disk_bytes -= self._disk_index.pop(key, 0)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def stats(self) -> dict:
+        lookups = sum(self.hits.values()) + self.misses
+        return {
+            "cache": self.name,
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "hit_rate": round((lookups - self.misses) / lookups, 3) if lookups else 0.0,
+            "evictions": dict(self.evictions),
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self._disk_index) if self._disk_index is not None else None,
+            "disk_bytes": self._disk_bytes if self._disk_index is not None else None
+        }
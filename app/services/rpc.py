@@ -0,0 +1,363 @@
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import aiohttp
+from web3 import AsyncWeb3
+from web3.providers.async_base import AsyncJSONBaseProvider
+from web3.types import RPCEndpoint, RPCResponse
+
+from app.config import settings
+
+# Calls that are safe to send to more than one endpoint
+READ_METHODS = {
+    "eth_blockNumber",
+    "eth_call",
+    "eth_chainId",
+    "eth_estimateGas",
+    "eth_feeHistory",
+    "eth_gasPrice",
+    "eth_getBalance",
+    "eth_getBlockByHash",
+    "eth_getBlockByNumber",
+    "eth_getCode",
+    "eth_getLogs",
+    "eth_getStorageAt",
+    "eth_getTransactionByHash",
+    "eth_getTransactionCount",
+    "eth_getTransactionReceipt",
+    "eth_maxPriorityFeePerGas",
+    "net_version",
+    "web3_clientVersion"
+}
+
+
+class RPCError(Exception):
+    """Error returned by a JSON-RPC node for one call"""
+
+    def __init__(self, error: dict):
+        self.code = error.get("code")
+        super().__init__(error.get("message", str(error)))
+
+
+class Endpoint:
+    """One RPC URL of a chain, with rolling latency and error stats"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.latencies = deque(maxlen=settings.RPC_STATS_WINDOW)
+        self.outcomes = deque(maxlen=settings.RPC_STATS_WINDOW)
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.ejected_until
+
+    def percentile(self, percent: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    def record_success(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.outcomes.append(True)
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    def record_failure(self) -> None:
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= settings.RPC_EJECT_AFTER_FAILURES:
+            self.ejected_until = time.monotonic() + settings.RPC_EJECT_SECONDS
+
+    def stats(self) -> dict:
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "error_rate": round(self.outcomes.count(False) / len(self.outcomes), 3) if self.outcomes else None,
+            "consecutive_failures": self.consecutive_failures
+        }
+
+
+class FailoverProvider(AsyncJSONBaseProvider):
+    """web3 provider sending each request through the registry's endpoint selection"""
+
+    def __init__(self, registry: "ProviderRegistry", chain: str):
+        super().__init__()
+        self.registry = registry
+        self.chain = chain
+
+    async def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        read = method in READ_METHODS
+        raw_response = await self.registry.send(
+            self.chain, self.encode_rpc_request(method, params), read=read, hedge=read
+        )
+        return self.decode_rpc_response(raw_response)
+
+    async def is_connected(self, show_traceback: bool = False) -> bool:
+        return any(endpoint.healthy for endpoint in self.registry.endpoints[self.chain])
+
+
+class ProviderRegistry:
+    """One long-lived async Web3 client per chain, backed by all of the chain's RPC endpoints.
+
+    A chain's RPC setting may list several comma-separated URLs. Requests
+    share one aiohttp session per chain whose keep-alive connection pool is
+    reused by every request, so they don't pay TCP/TLS setup, and waiting on
+    the RPC never blocks the event loop.
+
+    Each endpoint keeps rolling latency and error stats. Requests go to the
+    fastest healthy endpoint and fail over to the next one; reads still
+    unanswered after the endpoint's RPC_HEDGE_PERCENTILE latency are also
+    sent to the runner-up, and the first answer wins. Endpoints failing
+    RPC_EJECT_AFTER_FAILURES times in a row are skipped for
+    RPC_EJECT_SECONDS. Background health checks probe every endpoint.
+    """
+
+    def __init__(self, chains: dict):
+        self.chains = chains
+        self.endpoints: Dict[str, List[Endpoint]] = {
+            chain: [Endpoint(url.strip()) for url in (config["rpc"] or "").split(",") if url.strip()]
+            for chain, config in chains.items()
+        }
+        self._clients: Dict[str, AsyncWeb3] = {}
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._health: Dict[str, dict] = {}
+        self._checked: Dict[str, float] = {}  # When each chain's health check last started (monotonic)
+        self._lock = asyncio.Lock()
+        self._request_ids = itertools.count(1)
+        self._monitor: Optional[asyncio.Task] = None
+
+    async def get(self, chain: str) -> AsyncWeb3:
+        """Pooled client for a chain; fails fast if no endpoint passed the last health check.
+
+        A failed check older than RPC_HEALTH_RECHECK_SECONDS is repeated
+        inline first, so a brief outage doesn't fail requests for a whole
+        health check interval.
+        """
+
+        if chain not in self.chains:
+            raise ValueError(f"Unsupported chain: {chain}")
+
+        health = self._health.get(chain)
+        if health and not health["healthy"] and (
+            time.monotonic() - self._checked.get(chain, 0.0) >= settings.RPC_HEALTH_RECHECK_SECONDS
+        ):
+            health = await self.check(chain)
+        if health and not health["healthy"]:
+            raise ConnectionError(f"Failed to connect to {self.chains[chain]['name']}: {health['error']}")
+
+        return await self._client(chain)
+
+    async def _client(self, chain: str) -> AsyncWeb3:
+        client = self._clients.get(chain)
+        if client is not None:
+            return client
+
+        async with self._lock:
+            if chain not in self._clients:
+                self._sessions[chain] = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=settings.RPC_POOL_SIZE),
+                    timeout=aiohttp.ClientTimeout(total=settings.RPC_TIMEOUT_SECONDS)
+                )
+                client = AsyncWeb3(FailoverProvider(self, chain))
+                # Its chain ID check costs an eth_chainId round trip per call; deployments
+                # verify the chain ID once in their pre-flight instead
+                client.middleware_onion.remove("validation")
+                self._clients[chain] = client
+            return self._clients[chain]
+
+    async def batch(self, chain: str, calls: List[Tuple[str, list]], hedge: bool = False) -> List[Any]:
+        """Send several JSON-RPC calls to a chain in one HTTP request.
+
+        Returns the raw results in call order; a call the node rejected is
+        returned as an ``RPCError`` instead of failing the whole batch.
+        ``hedge`` lets a slow batch of reads race a second endpoint.
+        """
+
+        ids = [next(self._request_ids) for _ in calls]
+        payload = [
+            {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+            for request_id, (method, params) in zip(ids, calls)
+        ]
+        read = all(method in READ_METHODS for method, _ in calls)
+        replies = json.loads(await self.send(chain, json.dumps(payload).encode(), read=read, hedge=hedge))
+
+        if not isinstance(replies, list):  # Some nodes answer a rejected batch with one error
+            raise RPCError(replies.get("error", {"message": "Invalid batch response"}))
+
+        by_id = {reply.get("id"): reply for reply in replies}
+        results = []
+        for request_id in ids:
+            reply = by_id.get(request_id, {"error": {"message": "Missing from batch response"}})
+            results.append(RPCError(reply["error"]) if reply.get("error") else reply.get("result"))
+        return results
+
+    async def send(self, chain: str, body: bytes, read: bool, hedge: bool = False) -> bytes:
+        """POST a JSON-RPC body to the chain's best endpoint, failing over to the others.
+
+        Reads fail over on any error and, with ``hedge``, race the runner-up
+        once they are slower than usual. Writes may have reached the node
+        even when the reply was lost, so they only move on when the
+        connection itself could not be made.
+        """
+
+        await self._client(chain)
+        endpoints = self._ranked(chain)
+        if not endpoints:
+            raise ConnectionError(f"No RPC endpoint configured for {self.chains[chain]['name']}")
+
+        errors = []
+        if not read:
+            for endpoint in endpoints:
+                try:
+                    result = await self._post(chain, endpoint, body)
+                    self._mark_reachable(chain)
+                    return result
+                except aiohttp.ClientConnectorError as e:
+                    errors.append(f"{endpoint.url}: {e}")
+            raise ConnectionError(f"All {self.chains[chain]['name']} RPC endpoints failed: {'; '.join(errors)}")
+
+        queue = list(endpoints)
+        running: Dict[asyncio.Task, Endpoint] = {}
+        try:
+            while queue or running:
+                if queue and not running:
+                    endpoint = queue.pop(0)
+                    running[asyncio.create_task(self._post(chain, endpoint, body))] = endpoint
+
+                delay = None
+                if hedge and queue and len(running) == 1:
+                    delay = self._hedge_delay(next(iter(running.values())))
+
+                done, _ = await asyncio.wait(running, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    endpoint = queue.pop(0)
+                    running[asyncio.create_task(self._post(chain, endpoint, body))] = endpoint
+                    continue
+
+                for task in done:
+                    endpoint = running.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        errors.append(f"{endpoint.url}: {e}")
+                        continue
+
+                    # Let a hedging race's loser finish in the background so its real latency is recorded
+                    for loser in running:
+                        loser.add_done_callback(lambda t: t.cancelled() or t.exception())
+                    running.clear()
+                    self._mark_reachable(chain)
+                    return result
+        finally:
+            for task in running:
+                task.cancel()
+
+        raise ConnectionError(f"All {self.chains[chain]['name']} RPC endpoints failed: {'; '.join(errors)}")
+
+    def _mark_reachable(self, chain: str) -> None:
+        """Clear a failed health check once a request to the chain succeeds"""
+
+        health = self._health.get(chain)
+        if health and not health["healthy"]:
+            self._health[chain] = {**health, "healthy": True, "error": None}
+
+    def _ranked(self, chain: str) -> List[Endpoint]:
+        """Healthy endpoints fastest first, then recently failing ones, then ejected ones as a last resort"""
+
+        endpoints = self.endpoints[chain]
+        healthy = sorted(
+            (e for e in endpoints if e.healthy),
+            key=lambda e: (e.consecutive_failures > 0, e.percentile(50) or 0.0)  # Untried ones get a chance
+        )
+        ejected = sorted((e for e in endpoints if not e.healthy), key=lambda e: e.ejected_until)
+        return healthy + ejected
+
+    def _hedge_delay(self, endpoint: Endpoint) -> Optional[float]:
+        if settings.RPC_HEDGE_PERCENTILE <= 0:
+            return None
+        latency = endpoint.percentile(settings.RPC_HEDGE_PERCENTILE)
+        if latency is None or len(endpoint.latencies) < 10:
+            latency = settings.RPC_TIMEOUT_SECONDS / 10  # Too few samples for a percentile yet
+        return max(latency, settings.RPC_HEDGE_MIN_DELAY_MS / 1000)
+
+    async def _post(self, chain: str, endpoint: Endpoint, body: bytes) -> bytes:
+        started = time.monotonic()
+        try:
+            async with self._sessions[chain].post(
+                endpoint.url, data=body, headers={"Content-Type": "application/json"}
+            ) as response:
+                response.raise_for_status()
+                raw_response = await response.read()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            endpoint.record_failure()
+            raise
+
+        endpoint.record_success(time.monotonic() - started)
+        return raw_response
+
+    async def start(self) -> None:
+        """Start the background health checks"""
+
+        if self._monitor is None and settings.RPC_HEALTH_CHECK_INTERVAL_SECONDS > 0:
+            self._monitor = asyncio.create_task(self._monitor_health())
+
+    async def _monitor_health(self) -> None:
+        while True:
+            await asyncio.gather(*(self.check(chain) for chain in self.chains if self.endpoints[chain]))
+            await asyncio.sleep(settings.RPC_HEALTH_CHECK_INTERVAL_SECONDS)
+
+    async def check(self, chain: str) -> dict:
+        """Probe each of a chain's endpoints once and record the result"""
+
+        await self._client(chain)
+        self._checked[chain] = time.monotonic()
+        body = json.dumps({"jsonrpc": "2.0", "id": 0, "method": "eth_blockNumber", "params": []}).encode()
+
+        async def probe(endpoint: Endpoint) -> Union[int, Exception]:
+            try:
+                return int(json.loads(await self._post(chain, endpoint, body))["result"], 16)
+            except Exception as e:
+                return e
+
+        started = time.monotonic()
+        results = await asyncio.gather(*(probe(endpoint) for endpoint in self.endpoints[chain]))
+        block_numbers = [result for result in results if isinstance(result, int)]
+        errors = [f"{e.url}: {result}" for e, result in zip(self.endpoints[chain], results) if isinstance(result, Exception)]
+
+        health = {
+            "healthy": bool(block_numbers),
+            "block_number": max(block_numbers) if block_numbers else None,
+            "error": None if block_numbers else "; ".join(errors),
+            "latency_ms": round((time.monotonic() - started) * 1000, 1),
+            "checked_at": datetime.now().isoformat(),
+            "endpoints": [endpoint.stats() for endpoint in self.endpoints[chain]]
+        }
+        self._health[chain] = health
+        return health
+
+    def health(self) -> dict:
+        return {chain: self._health.get(chain) for chain in self.chains}
+
+    async def shutdown(self) -> None:
+        if self._monitor is not None:
+            self._monitor.cancel()
+            await asyncio.gather(self._monitor, return_exceptions=True)
+            self._monitor = None
+
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
+        self._clients.clear()
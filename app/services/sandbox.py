@@ -0,0 +1,135 @@
+"""
+Resource-limited launcher for analysis tools.
+
+``run_process`` starts tools through this file (run as a script, so it only
+uses the standard library) when a job has limits. The launcher forks, applies
+the address-space and CPU rlimits in the child, execs the tool, forwards
+SIGINT/SIGTERM to it and, once it exits, writes its exit status, peak RSS
+and CPU time (from ``wait4``) to a JSON usage file.
+
+rlimits, fork and wait4 are POSIX-only: elsewhere (Windows) tools run
+without the sandbox and without resource usage figures.
+"""
+
+import json
+import os
+import re
+import signal
+import sys
+from dataclasses import dataclass
+from typing import List, Optional
+
+SANDBOX_SUPPORTED = os.name == "posix"
+
+if SANDBOX_SUPPORTED:
+    import resource
+
+# Messages tools print when an allocation fails under RLIMIT_AS
+OUT_OF_MEMORY_RE = re.compile(r"MemoryError|std::bad_alloc|out of memory|Cannot allocate memory", re.I)
+
+
+@dataclass
+class ResourceLimits:
+    memory_mb: int = 0  # Address space cap; 0 = unlimited
+    cpu_seconds: int = 0  # CPU time cap; 0 = unlimited
+
+    @property
+    def enabled(self) -> bool:
+        return self.memory_mb > 0 or self.cpu_seconds > 0
+
+
+def apply_limits(memory_mb: int, cpu_seconds: int, cpu_used: float = 0.0) -> None:
+    """Set rlimits on the current process (CPU time counted from ``cpu_used``)"""
+
+    if memory_mb > 0:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if cpu_seconds > 0:
+        # The soft limit raises SIGXCPU; the hard limit is left alone so a
+        # long-lived worker can move the soft limit forward for each job
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = int(cpu_used) + cpu_seconds
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def peak_rss_mb(ru_maxrss: int) -> float:
+    """``ru_maxrss`` in MB: the kernel reports it in KB on Linux, bytes on macOS"""
+
+    return ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def sandbox_command(args: List[str], limits: ResourceLimits, usage_file: str) -> List[str]:
+    return [
+        sys.executable, "-I", "-S", os.path.abspath(__file__),
+        "--memory-mb", str(limits.memory_mb),
+        "--cpu-seconds", str(limits.cpu_seconds),
+        "--usage-file", usage_file,
+        "--", *args
+    ]
+
+
+def read_usage(usage_file: str) -> Optional[dict]:
+    try:
+        with open(usage_file) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def limit_exceeded(usage: dict, stderr: str, limits: ResourceLimits) -> Optional[str]:
+    """Which limit ("memory" or "cpu") stopped a sandboxed run, if any"""
+
+    if usage["returncode"] == 0:
+        return None
+    if limits.cpu_seconds and (
+        usage["returncode"] == -signal.SIGXCPU
+        or (usage["returncode"] == -signal.SIGKILL and usage["cpu_seconds"] >= limits.cpu_seconds)
+    ):
+        return "cpu"
+    if limits.memory_mb and OUT_OF_MEMORY_RE.search(stderr):
+        return "memory"
+    return None
+
+
+def main(argv: List[str]) -> int:
+    options = {"--memory-mb": "0", "--cpu-seconds": "0", "--usage-file": None}
+    while argv and argv[0] != "--":
+        options[argv[0]] = argv[1]
+        argv = argv[2:]
+    command = argv[1:]
+
+    child = []
+
+    def forward(signum, _frame):
+        if child:
+            os.kill(child[0], signum)
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, forward)
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            apply_limits(int(options["--memory-mb"]), int(options["--cpu-seconds"]))
+            os.execvp(command[0], command)
+        except OSError as e:
+            os.write(2, f"sandbox: {command[0]}: {e}\n".encode())
+        os._exit(127)
+
+    child.append(pid)
+    _, status, usage = os.wait4(pid, 0)
+    returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+
+    with open(options["--usage-file"], "w") as f:
+        json.dump({
+            "returncode": returncode,
+            "peak_rss_mb": round(peak_rss_mb(usage.ru_maxrss), 1),
+            "cpu_seconds": round(usage.ru_utime + usage.ru_stime, 3)
+        }, f)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,124 +1,503 @@
-import subprocess
+import asyncio
 import json
-import tempfile
 import os
+import re
+import tempfile
+import time
 from pathlib import Path
-from typing import Optional
+from typing import AsyncGenerator, List, Optional, Tuple
+
+from app.config import settings
+from app.services.compiler import (
+    CompilationError,
+    compiler_service,
+    deployable_contracts,
+    source_line,
+    write_sources
+)
+from app.services.result_cache import ResultCache, cache_key, source_hash
+from app.services.sandbox import ResourceLimits
+from app.services.slither_workers import SlitherWorkerPool
+from app.services.solidity_rules import scan
+from app.services.tool_pool import QueueFullError, ToolPool, run_process
+
+# Mythril analysis profiles: symbolic execution limits and the default time budget
+MYTHRIL_PROFILES = {
+    "quick": {
+        "execution_timeout": 30,
+        "max_depth": 12,
+        "transaction_count": 1,
+        "solver_timeout": 5000,
+        "budget": 60
+    },
+    "standard": {
+        "execution_timeout": 150,
+        "max_depth": 22,
+        "transaction_count": 2,
+        "solver_timeout": 10000,
+        "budget": settings.MYTHRIL_TIMEOUT_SECONDS
+    },
+    "deep": {
+        "execution_timeout": 1200,
+        "max_depth": 64,
+        "transaction_count": 3,
+        "solver_timeout": 30000,
+        "budget": 1800
+    }
+}
+
+MYTHRIL_MIN_RUN_SECONDS = 10
+
+# Sources larger than this are pre-scanned off the event loop
+PRESCAN_INLINE_MAX_CHARS = 50_000
+
+VERSION_COMMANDS = {
+    "slither": ["slither", "--version"],
+    "mythril": ["myth", "version"]
+}
 
 
 class SecurityService:
     """Service for running security analysis tools"""
 
-    async def run_slither(self, contract_code: str, filename: str = "Contract.sol") -> dict:
-        """Run Slither static analysis"""
+    def __init__(self):
+        self.pools = {
+            "slither": ToolPool(
+                "slither",
+                max_concurrency=settings.SLITHER_MAX_CONCURRENCY or os.cpu_count() or 1,
+                max_queue=settings.SECURITY_QUEUE_MAX_DEPTH,
+                limits=ResourceLimits(settings.SLITHER_MEMORY_LIMIT_MB, settings.SLITHER_CPU_LIMIT_SECONDS)
+            ),
+            "mythril": ToolPool(
+                "mythril",
+                max_concurrency=settings.MYTHRIL_MAX_CONCURRENCY,
+                max_queue=settings.SECURITY_QUEUE_MAX_DEPTH,
+                limits=ResourceLimits(settings.MYTHRIL_MEMORY_LIMIT_MB, settings.MYTHRIL_CPU_LIMIT_SECONDS)
+            )
+        }
+        self.cache = ResultCache(
+            "audit",
+            memory_entries=settings.AUDIT_CACHE_MEMORY_ENTRIES,
+            disk_dir=settings.AUDIT_CACHE_DIR,
+            disk_max_bytes=settings.AUDIT_CACHE_DISK_MAX_MB * 1024 * 1024
+        )
+        self.slither_workers = SlitherWorkerPool(
+            size=settings.SLITHER_WORKERS,
+            max_jobs=settings.SLITHER_WORKER_MAX_JOBS,
+            max_rss_mb=settings.SLITHER_WORKER_MAX_RSS_MB,
+            limits=self.pools["slither"].limits
+        )
+        self._versions = {}
+
+    def queue_stats(self) -> dict:
+        """Current concurrency and queue metrics for each tool"""
+
+        stats = {name: pool.stats() for name, pool in self.pools.items()}
+        stats["slither"]["workers"] = self.slither_workers.stats()
+        return stats
+
+    async def tool_version(self, tool: str) -> str:
+        """Installed version of an analysis tool (looked up once per process)"""
+
+        if tool not in self._versions:
+            self._versions[tool] = asyncio.ensure_future(self._lookup_version(tool))
+        return await asyncio.shield(self._versions[tool])
+
+    async def _lookup_version(self, tool: str) -> str:
+        try:
+            result = await run_process(VERSION_COMMANDS[tool], timeout=30)
+        except (OSError, asyncio.TimeoutError):
+            return "unavailable"
+
+        match = re.search(r"\d+\.\d+\.\d+", result.stdout + result.stderr)
+        return match.group() if match else "unknown"
+
+    async def _cache_key(self, tool: str, contract_code: str, *options: str) -> str:
+        try:
+            solc_version, _, imports = await compiler_service.toolchain(contract_code)
+            libraries = imports.libraries
+        except CompilationError:
+            solc_version, libraries = "unavailable", []  # Compilation fails, so the result is never cached
+
+        return cache_key(
+            source_hash(contract_code),
+            tool,
+            await self.tool_version(tool),
+            solc_version,
+            *libraries,
+            *options
+        )
+
+    async def quick_scan(self, contract_code: str) -> dict:
+        """Millisecond in-process rule scan, scored like a full audit"""
+
+        started = time.perf_counter()
+        if len(contract_code) > PRESCAN_INLINE_MAX_CHARS:
+            issues = await asyncio.to_thread(scan, contract_code)
+        else:
+            issues = scan(contract_code)
+        summary = summarize_issues(issues)
+
+        return {
+            "score": score_issues(summary),
+            "issues": issues,
+            "summary": summary,
+            "tools_used": ["prescan"],
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    async def run_slither(
+        self,
+        contract_code: str,
+        filename: str = "Contract.sol",
+        priority: int = 0
+    ) -> dict:
+        """Run Slither static analysis (cached by source and tool versions)"""
+
+        key = await self._cache_key("slither", contract_code, filename)
+        return await self.cache.get_or_compute(
+            key,
+            lambda: self._run_slither(contract_code, filename, priority),
+            cacheable=is_successful
+        )
+
+    async def run_mythril(
+        self,
+        contract_code: str,
+        filename: str = "Contract.sol",
+        priority: int = 0,
+        profile: str = "standard",
+        time_budget: Optional[float] = None
+    ) -> dict:
+        """Run Mythril symbolic analysis (cached by source, tool versions and profile)"""
+
+        budget = mythril_budget(profile, time_budget)
+        key = await self._cache_key("mythril", contract_code, filename, profile, str(budget))
+        return await self.cache.get_or_compute(
+            key,
+            lambda: self._run_mythril(contract_code, filename, priority, profile, budget),
+            cacheable=is_successful
+        )
+
+    async def _run_slither(self, contract_code: str, filename: str, priority: int) -> dict:
+        """Run Slither on the shared compilation workspace, in a warm worker when available"""
+
+        try:
+            artifact = await compiler_service.compile(contract_code, filename)
+        except CompilationError as e:
+            return {"success": False, "error": str(e)}
 
         with tempfile.TemporaryDirectory() as tmpdir:
-            # Write contract to temp file
-            contract_path = Path(tmpdir) / filename
-            contract_path.write_text(contract_code)
+            contract_path = write_sources(artifact, tmpdir)
+
+            # Slither compiles through crytic-compile; pin it to the artifact's solc
+            solc_binary = compiler_service.solc_binary(artifact)
 
             try:
-                # Run slither
-                result = subprocess.run(
-                    ["slither", str(contract_path), "--json", "-"],
-                    capture_output=True,
-                    text=True,
-                    timeout=60
+                if self.slither_workers.enabled:
+                    async with self.pools["slither"].slot(priority):
+                        result = await self.slither_workers.analyze(
+                            str(contract_path),
+                            cwd=tmpdir,
+                            solc=solc_binary,
+                            timeout=settings.SLITHER_TIMEOUT_SECONDS
+                        )
+                    if result.get("resources", {}).get("limit_exceeded"):
+                        return limit_error("Slither", self.pools["slither"].limits, result["resources"])
+                    return result
+
+                args = ["slither", str(contract_path), "--json", "-"]
+                if solc_binary:
+                    args += ["--solc", solc_binary]
+
+                result = await self.pools["slither"].run(
+                    args,
+                    timeout=settings.SLITHER_TIMEOUT_SECONDS,
+                    cwd=tmpdir,
+                    priority=priority
                 )
 
+                if result.limit_exceeded:
+                    return limit_error("Slither", self.pools["slither"].limits, result.resources())
                 if result.stdout:
-                    return json.loads(result.stdout)
+                    return {**json.loads(result.stdout), "resources": result.resources()}
 
-                return {"success": False, "error": result.stderr or "Slither analysis failed"}
+                return {
+                    "success": False,
+                    "error": result.stderr or "Slither analysis failed",
+                    "resources": result.resources()
+                }
 
-            except subprocess.TimeoutExpired:
+            except asyncio.TimeoutError:
                 return {"success": False, "error": "Analysis timeout"}
             except FileNotFoundError:
                 return {
                     "success": False,
                     "error": "Slither not installed. Install with: pip install slither-analyzer"
                 }
+            except QueueFullError:
+                raise
             except Exception as e:
                 return {"success": False, "error": str(e)}
 
-    async def run_mythril(self, contract_code: str) -> dict:
-        """Run Mythril symbolic analysis"""
+    async def _run_mythril(
+        self,
+        contract_code: str,
+        filename: str,
+        priority: int,
+        profile: str,
+        budget: float
+    ) -> dict:
+        """Run Mythril on the compiled creation bytecode of each deployable contract.
 
-        with tempfile.NamedTemporaryFile(suffix=".sol", delete=False, mode='w') as f:
-            f.write(contract_code)
-            temp_path = f.name
+        The whole run must fit in ``budget`` seconds, counted from when a
+        Mythril slot is free (time queued for the slot is not included).
+        Mythril's own execution timeout is set below each contract's share of
+        what is left, and a contract still running at the deadline gets SIGINT
+        so it reports what it found so far; such results are flagged
+        ``partial``. Contracts that would get less than
+        ``MYTHRIL_MIN_RUN_SECONDS`` are skipped.
+        """
 
         try:
-            result = subprocess.run(
-                ["myth", "analyze", temp_path, "-o", "json"],
-                capture_output=True,
-                text=True,
-                timeout=300  # Mythril can take longer
+            artifact = await compiler_service.compile(contract_code, filename)
+        except CompilationError as e:
+            return {"success": False, "error": str(e)}
+
+        options = MYTHRIL_PROFILES[profile]
+        loop = asyncio.get_running_loop()
+        contracts = deployable_contracts(artifact)
+        issues = []
+        partial = False
+        skipped = []
+        resources = {"peak_rss_mb": None, "cpu_seconds": None, "limit_exceeded": None}
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            try:
+                async with self.pools["mythril"].slot(priority):
+                    deadline = loop.time() + budget
+
+                    for position, contract_name in enumerate(contracts):
+                        run = mythril_run_timeouts(
+                            deadline - loop.time(), len(contracts) - position, options["execution_timeout"]
+                        )
+                        if run is None:
+                            skipped = contracts[position:]
+                            partial = True
+                            break
+                        execution_timeout, timeout, grace = run
+
+                        contract = artifact["output"]["contracts"][artifact["source_path"]][contract_name]
+                        codefile = Path(tmpdir) / f"{contract_name}.bin"
+                        codefile.write_text(contract["evm"]["bytecode"]["object"])
+
+                        result = await run_process(
+                            [
+                                "myth", "analyze", "-f", str(codefile), "-o", "json",
+                                "--execution-timeout", str(execution_timeout),
+                                "--max-depth", str(options["max_depth"]),
+                                "--transaction-count", str(options["transaction_count"]),
+                                "--solver-timeout", str(options["solver_timeout"])
+                            ],
+                            timeout=timeout,
+                            cwd=tmpdir,
+                            interrupt_grace=grace,
+                            limits=self.pools["mythril"].limits
+                        )
+                        resources = merge_resources(resources, result.resources())
+                        if result.limit_exceeded:
+                            return limit_error("Mythril", self.pools["mythril"].limits, resources)
+                        if not result.stdout:
+                            return {"success": False, "error": result.stderr or "Mythril analysis failed"}
+
+                        output = json.loads(result.stdout)
+                        if output.get("error"):
+                            return output
+
+                        if result.interrupted or result.duration >= execution_timeout:
+                            partial = True
+                        for issue in output.get("issues", []):
+                            issues.append(self._locate_mythril_issue(artifact, contract_name, issue))
+
+            except asyncio.TimeoutError:
+                return {
+                    "success": False,
+                    "error": f"Analysis timeout (>{budget:g} seconds, no partial results)"
+                }
+            except FileNotFoundError:
+                return {
+                    "success": False,
+                    "error": "Mythril not installed. Install with: pip install mythril"
+                }
+            except QueueFullError:
+                raise
+            except Exception as e:
+                return {"success": False, "error": str(e)}
+
+        return {
+            "success": True,
+            "error": None,
+            "issues": issues,
+            "profile": profile,
+            "time_budget": budget,
+            "partial": partial,
+            "skipped_contracts": skipped,
+            "resources": resources
+        }
+
+    def _locate_mythril_issue(self, artifact: dict, contract_name: str, issue: dict) -> dict:
+        """Attach contract, file and line to an issue found in raw bytecode"""
+
+        issue = {**issue, "contract": contract_name, "filename": artifact["source_path"]}
+        if isinstance(issue.get("address"), int):
+            issue["lineno"] = source_line(
+                artifact,
+                contract_name,
+                issue["address"],
+                runtime=issue.get("function") != "constructor"
             )
+        return issue
+
+    async def full_audit(
+        self,
+        contract_code: str,
+        filename: str = "Contract.sol",
+        priority: int = 0,
+        profile: str = "standard",
+        time_budget: Optional[float] = None
+    ) -> dict:
+        """Run complete security audit"""
 
-            os.unlink(temp_path)
+        # The tools are independent, so run them side by side
+        tasks = [
+            asyncio.create_task(self.run_slither(contract_code, filename, priority)),
+            asyncio.create_task(self.run_mythril(contract_code, filename, priority, profile, time_budget))
+        ]
+        try:
+            slither_results, mythril_results = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
 
-            if result.stdout:
-                return json.loads(result.stdout)
+        return self.build_report(slither_results, mythril_results)
 
-            return {"success": False, "error": result.stderr or "Mythril analysis failed"}
+    async def stream_audit(
+        self,
+        contract_code: str,
+        filename: str = "Contract.sol",
+        priority: int = 0,
+        profile: str = "standard",
+        time_budget: Optional[float] = None
+    ) -> AsyncGenerator[dict, None]:
+        """Run a full audit: the instant pre-scan first, then each tool's findings as it finishes"""
 
-        except subprocess.TimeoutExpired:
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
-            return {"success": False, "error": "Analysis timeout (>5 minutes)"}
-        except FileNotFoundError:
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
-            return {
-                "success": False,
-                "error": "Mythril not installed. Install with: pip install mythril"
+        tasks = {
+            asyncio.create_task(self.run_slither(contract_code, filename, priority)): "slither",
+            asyncio.create_task(
+                self.run_mythril(contract_code, filename, priority, profile, time_budget)
+            ): "mythril"
+        }
+        results = {}
+
+        try:
+            prescan = await self.quick_scan(contract_code)
+            yield {
+                "event": "prescan",
+                "issues": prescan["issues"],
+                "summary": prescan["summary"],
+                "score": prescan["score"],
+                "error": None
             }
-        except Exception as e:
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
-            return {"success": False, "error": str(e)}
 
-    async def full_audit(self, contract_code: str) -> dict:
-        """Run complete security audit"""
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    tool = tasks[task]
+                    results[tool] = task.result()
+                    issues = TOOL_ISSUE_PARSERS[tool](results[tool])
+                    yield {
+                        "event": tool,
+                        "issues": issues,
+                        "summary": summarize_issues(issues),
+                        "error": results[tool].get("error")
+                    }
+        finally:
+            # Client went away or a tool raised: don't leave analyses running
+            for task in tasks:
+                task.cancel()
+
+        yield {"event": "report", **self.build_report(results["slither"], results["mythril"])}
+
+    async def is_cached(
+        self,
+        contract_code: str,
+        filename: str = "Contract.sol",
+        profile: str = "standard",
+        time_budget: Optional[float] = None
+    ) -> bool:
+        """Whether both tools' results for a source are already cached"""
 
-        slither_results = await self.run_slither(contract_code)
-        mythril_results = await self.run_mythril(contract_code)
-
-        # Combine and score
-        all_issues = []
-
-        # Process Slither results
-        if slither_results.get("success", True) and not slither_results.get("error"):
-            detectors = slither_results.get("results", {}).get("detectors", [])
-            for detector in detectors:
-                impact = detector.get("impact", "unknown").lower()
-                all_issues.append({
-                    "tool": "slither",
-                    "severity": impact if impact in ["high", "medium", "low"] else "low",
-                    "confidence": detector.get("confidence", "unknown"),
-                    "description": detector.get("description", ""),
-                    "check": detector.get("check", "")
-                })
-
-        # Process Mythril results
-        if mythril_results.get("success", True) and not mythril_results.get("error"):
-            issues = mythril_results.get("issues", [])
-            for issue in issues:
-                severity = issue.get("severity", "unknown").lower()
-                all_issues.append({
-                    "tool": "mythril",
-                    "severity": severity if severity in ["high", "medium", "low"] else "low",
-                    "description": issue.get("description", ""),
-                    "swc_id": issue.get("swc-id", "")
-                })
-
-        # Calculate score
-        high_count = sum(1 for i in all_issues if i["severity"] == "high")
-        medium_count = sum(1 for i in all_issues if i["severity"] == "medium")
-        low_count = sum(1 for i in all_issues if i["severity"] == "low")
-
-        score = max(0, 100 - (high_count * 25) - (medium_count * 10) - (low_count * 2))
+        budget = mythril_budget(profile, time_budget)
+        keys = [
+            await self._cache_key("slither", contract_code, filename),
+            await self._cache_key("mythril", contract_code, filename, profile, str(budget))
+        ]
+        for key in keys:
+            if not await self.cache.contains(key):
+                return False
+        return True
+
+    async def batch_audit(
+        self,
+        sources: List[Tuple[str, str]],
+        priority: int = 0,
+        profile: str = "standard",
+        time_budget: Optional[float] = None
+    ) -> dict:
+        """Audit many (code, filename) sources, running each distinct source once"""
+
+        unique = {}
+        entries = []
+        for index, (code, filename) in enumerate(sources):
+            key = (source_hash(code), filename)
+            entries.append({
+                "index": index,
+                "filename": filename,
+                "source_hash": key[0],
+                "duplicate_of": unique.get(key)
+            })
+            unique.setdefault(key, index)
+
+        # Admit only as many contracts at once as the tool pools can run, so a
+        # large batch waits here instead of overflowing the shared queues
+        admission = asyncio.Semaphore(settings.BATCH_AUDIT_CONCURRENCY or os.cpu_count() or 1)
+
+        async def audit(index: int) -> dict:
+            code, filename = sources[index]
+            cached = await self.is_cached(code, filename, profile, time_budget)
+            async with admission:
+                try:
+                    report = await self.full_audit(code, filename, priority, profile, time_budget)
+                except QueueFullError as e:
+                    return {"cached": False, "error": str(e)}
+            return {"cached": cached, **report}
+
+        indexes = list(unique.values())
+        results = dict(zip(indexes, await asyncio.gather(*(audit(index) for index in indexes))))
+
+        reports = []
+        for entry in entries:
+            original = entry["duplicate_of"] if entry["duplicate_of"] is not None else entry["index"]
+            reports.append({**entry, **results[original]})
+
+        return {"reports": reports, "summary": summarize_batch(reports, len(unique))}
+
+    def build_report(self, slither_results: dict, mythril_results: dict) -> dict:
+        """Combine raw tool output into a scored report"""
+
+        all_issues = slither_issues(slither_results) + mythril_issues(mythril_results)
+        summary = summarize_issues(all_issues)
 
         tools_run = []
         if not slither_results.get("error"):
@@ -127,14 +506,9 @@ class SecurityService:
             tools_run.append("mythril")
 
         return {
-            "score": score,
+            "score": score_issues(summary),
             "issues": all_issues,
-            "summary": {
-                "high": high_count,
-                "medium": medium_count,
-                "low": low_count,
-                "total": len(all_issues)
-            },
+            "summary": summary,
             "tools_used": tools_run,
             "errors": {
                 "slither": slither_results.get("error"),
@@ -143,4 +517,143 @@ class SecurityService:
         }
 
 
+def mythril_budget(profile: str, time_budget: Optional[float] = None) -> float:
+    """Validate an analysis profile and resolve the Mythril time budget in seconds"""
+
+    if profile not in MYTHRIL_PROFILES:
+        raise ValueError(f"Unknown analysis profile: {profile}. Use one of: {', '.join(MYTHRIL_PROFILES)}")
+    if time_budget is not None and time_budget < MYTHRIL_MIN_RUN_SECONDS:
+        raise ValueError(f"Time budget must be at least {MYTHRIL_MIN_RUN_SECONDS} seconds")
+
+    return min(time_budget or MYTHRIL_PROFILES[profile]["budget"], settings.MYTHRIL_MAX_TIME_BUDGET_SECONDS)
+
+
+def mythril_run_timeouts(
+    remaining: float,
+    contracts_left: int,
+    max_execution_timeout: int
+) -> Optional[Tuple[int, float, float]]:
+    """Split the remaining budget for the next Mythril run.
+
+    Each run gets an equal share of ``remaining``, but never less than
+    ``MYTHRIL_MIN_RUN_SECONDS``: when the budget can't cover every contract
+    left, the shares are sized for as many as fit and the trailing ones are
+    skipped. Returns Mythril's execution timeout, the process timeout and
+    the SIGINT grace after it, or None if not even one run fits.
+    """
+
+    runs = min(contracts_left, int(remaining // MYTHRIL_MIN_RUN_SECONDS))
+    if runs < 1:
+        return None
+
+    share = remaining / runs
+    grace = max(MYTHRIL_MIN_RUN_SECONDS / 2, share * 0.1)
+    execution_timeout = max(1, int(min(max_execution_timeout, share - grace)))
+    return execution_timeout, share - grace / 2, grace / 2
+
+
+def limit_error(tool: str, limits: ResourceLimits, resources: dict) -> dict:
+    """Result for a tool run stopped by its sandbox limits"""
+
+    limit = resources["limit_exceeded"]
+    cap = f"{limits.memory_mb} MB" if limit == "memory" else f"{limits.cpu_seconds} s of CPU"
+    return {
+        "success": False,
+        "error": f"{tool} exceeded its {limit} limit ({cap})",
+        "resources": resources
+    }
+
+
+def merge_resources(total: dict, usage: dict) -> dict:
+    """Combine the resource usage of several runs of one tool"""
+
+    peaks = [v for v in (total["peak_rss_mb"], usage["peak_rss_mb"]) if v is not None]
+    cpu = [v for v in (total["cpu_seconds"], usage["cpu_seconds"]) if v is not None]
+    return {
+        "peak_rss_mb": max(peaks) if peaks else None,
+        "cpu_seconds": round(sum(cpu), 3) if cpu else None,
+        "limit_exceeded": total["limit_exceeded"] or usage["limit_exceeded"]
+    }
+
+
+def is_successful(results: dict) -> bool:
+    """Whether tool output is a real analysis result (worth caching) rather than an error"""
+    return results.get("success", True) and not results.get("error")
+
+
+def slither_issues(slither_results: dict) -> List[dict]:
+    """Normalize Slither detector output into audit issues"""
+
+    issues = []
+    if slither_results.get("success", True) and not slither_results.get("error"):
+        detectors = slither_results.get("results", {}).get("detectors", [])
+        for detector in detectors:
+            impact = detector.get("impact", "unknown").lower()
+            issues.append({
+                "tool": "slither",
+                "severity": impact if impact in ["high", "medium", "low"] else "low",
+                "confidence": detector.get("confidence", "unknown"),
+                "description": detector.get("description", ""),
+                "check": detector.get("check", "")
+            })
+    return issues
+
+
+def mythril_issues(mythril_results: dict) -> List[dict]:
+    """Normalize Mythril output into audit issues"""
+
+    issues = []
+    if mythril_results.get("success", True) and not mythril_results.get("error"):
+        for issue in mythril_results.get("issues", []):
+            severity = issue.get("severity", "unknown").lower()
+            issues.append({
+                "tool": "mythril",
+                "severity": severity if severity in ["high", "medium", "low"] else "low",
+                "description": issue.get("description", ""),
+                "swc_id": issue.get("swc-id", "")
+            })
+    return issues
+
+
+TOOL_ISSUE_PARSERS = {
+    "slither": slither_issues,
+    "mythril": mythril_issues
+}
+
+
+def summarize_issues(issues: List[dict]) -> dict:
+    return {
+        "high": sum(1 for i in issues if i["severity"] == "high"),
+        "medium": sum(1 for i in issues if i["severity"] == "medium"),
+        "low": sum(1 for i in issues if i["severity"] == "low"),
+        "total": len(issues)
+    }
+
+
+def score_issues(summary: dict) -> int:
+    return max(0, 100 - (summary["high"] * 25) - (summary["medium"] * 10) - (summary["low"] * 2))
+
+
+def summarize_batch(reports: List[dict], unique_count: int) -> dict:
+    """Aggregate per-contract reports of a batch audit"""
+
+    scored = [r for r in reports if "score" in r]
+    distinct = [r for r in reports if r["duplicate_of"] is None]
+    issues = {"high": 0, "medium": 0, "low": 0, "total": 0}
+    for report in scored:
+        for severity in issues:
+            issues[severity] += report["summary"][severity]
+
+    return {
+        "contracts": len(reports),
+        "unique": unique_count,
+        "duplicates": len(reports) - unique_count,
+        "cached": sum(1 for r in distinct if r.get("cached")),
+        "failed": sum(1 for r in distinct if "error" in r),
+        "average_score": round(sum(r["score"] for r in scored) / len(scored), 1) if scored else None,
+        "min_score": min((r["score"] for r in scored), default=None),
+        "issues": issues
+    }
+
+
 security_service = SecurityService()
@@ -0,0 +1,203 @@
+import asyncio
+import importlib.util
+import os
+import signal
+from typing import Optional
+
+from app.services.processes import spawn_context
+from app.services.sandbox import SANDBOX_SUPPORTED, ResourceLimits, apply_limits, peak_rss_mb
+
+if SANDBOX_SUPPORTED:
+    import resource
+
+
+def slither_available() -> bool:
+    return importlib.util.find_spec("slither") is not None
+
+
+def _worker_main(conn, max_jobs: int, max_rss_mb: int, limits: ResourceLimits) -> None:
+    """Worker loop: import Slither once, then serve analyses until told to stop or recycled"""
+
+    apply_limits(limits.memory_mb, 0)
+
+    import inspect
+    from slither import Slither
+    from slither.detectors import all_detectors
+    from slither.detectors.abstract_detector import AbstractDetector
+
+    detectors = [
+        detector for detector in vars(all_detectors).values()
+        if inspect.isclass(detector) and issubclass(detector, AbstractDetector)
+        and detector is not AbstractDetector
+    ]
+    jobs = 0
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        cpu_before = usage.ru_utime + usage.ru_stime
+        apply_limits(0, limits.cpu_seconds, cpu_used=cpu_before)
+        limit = None
+
+        try:
+            os.chdir(job["cwd"])
+            kwargs = {"solc": job["solc"]} if job.get("solc") else {}
+            slither = Slither(job["target"], **kwargs)
+            for detector in detectors:
+                slither.register_detector(detector)
+            findings = [finding for group in slither.run_detectors() for finding in group]
+            result = {"success": True, "error": None, "results": {"detectors": findings}}
+        except MemoryError:
+            result = {"success": False, "error": "Slither ran out of memory"}
+            limit = "memory"
+        except Exception as e:
+            result = {"success": False, "error": f"Slither analysis failed: {e}"}
+
+        jobs += 1
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        peak_rss = peak_rss_mb(usage.ru_maxrss)
+        result["resources"] = {
+            "peak_rss_mb": round(peak_rss, 1),  # Peak of the worker so far
+            "cpu_seconds": round(usage.ru_utime + usage.ru_stime - cpu_before, 3),
+            "limit_exceeded": limit
+        }
+        retire = jobs >= max_jobs or peak_rss >= max_rss_mb or limit is not None
+        conn.send({"result": result, "retire": retire})
+        if retire:
+            return
+
+
+class _Worker:
+    def __init__(self, max_jobs: int, max_rss_mb: int, limits: ResourceLimits):
+        self.conn, child_conn = spawn_context.Pipe()
+        self.process = spawn_context.Process(
+            target=_worker_main,
+            args=(child_conn, max_jobs, max_rss_mb, limits),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def stop(self, force: bool = False) -> None:
+        if force:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class SlitherWorkerPool:
+    """Persistent Slither processes serving analyses over pipes.
+
+    Each worker pays the interpreter start, Slither import and detector
+    discovery once, and is replaced after ``max_jobs`` analyses or once its
+    peak RSS passes ``max_rss_mb``. Workers run under ``limits``: the memory
+    cap covers the whole worker, the CPU cap each analysis. Workers rely on
+    rlimits and pipe readers on the event loop, so they are POSIX-only;
+    elsewhere ``enabled`` is false and callers use a cold subprocess.
+    """
+
+    def __init__(self, size: int, max_jobs: int, max_rss_mb: int, limits: Optional[ResourceLimits] = None):
+        self.size = size
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.limits = limits or ResourceLimits()
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers = set()
+        self.recycled = 0
+        self.crashed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return SANDBOX_SUPPORTED and self.size > 0 and slither_available()
+
+    async def start(self) -> None:
+        """Spawn the workers (done lazily on first use if not called at startup)"""
+
+        if self._idle is not None or not self.enabled:
+            return
+        self._idle = asyncio.Queue()
+        for _ in range(self.size):
+            self._idle.put_nowait(await self._spawn())
+
+    async def _spawn(self) -> _Worker:
+        worker = await asyncio.to_thread(_Worker, self.max_jobs, self.max_rss_mb, self.limits)
+        self._workers.add(worker)
+        return worker
+
+    async def _replace(self, worker: _Worker, force: bool) -> None:
+        self._workers.discard(worker)
+        await asyncio.to_thread(worker.stop, force)
+        self._idle.put_nowait(await self._spawn())
+
+    async def analyze(self, target: str, cwd: str, solc: Optional[str], timeout: float) -> dict:
+        """Run Slither's detectors on ``target`` in a warm worker.
+
+        Raises ``asyncio.TimeoutError`` (after replacing the worker) if the
+        analysis does not finish within ``timeout`` seconds.
+        """
+
+        await self.start()
+        worker = await self._idle.get()
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+
+        def on_readable():
+            if not readable.done():
+                readable.set_result(None)
+
+        try:
+            worker.conn.send({"target": target, "cwd": cwd, "solc": solc})
+            loop.add_reader(worker.conn.fileno(), on_readable)
+            try:
+                await asyncio.wait_for(readable, timeout=timeout)
+            finally:
+                loop.remove_reader(worker.conn.fileno())
+            reply = worker.conn.recv()
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            await self._replace(worker, force=True)
+            raise
+        except (EOFError, OSError) as e:
+            await self._replace(worker, force=True)
+            if worker.process.exitcode == -signal.SIGXCPU:
+                return {
+                    "success": False,
+                    "error": "Slither ran out of CPU time",
+                    "resources": {"peak_rss_mb": None, "cpu_seconds": None, "limit_exceeded": "cpu"}
+                }
+            self.crashed += 1
+            return {"success": False, "error": f"Slither worker crashed: {e}"}
+
+        if reply["retire"]:
+            self.recycled += 1
+            await self._replace(worker, force=False)
+        else:
+            self._idle.put_nowait(worker)
+
+        return reply["result"]
+
+    async def shutdown(self) -> None:
+        workers, self._workers = list(self._workers), set()
+        self._idle = None
+        await asyncio.gather(*(asyncio.to_thread(worker.stop) for worker in workers))
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "workers": len(self._workers),
+            "idle": self._idle.qsize() if self._idle is not None else 0,
+            "recycled": self.recycled,
+            "crashed": self.crashed
+        }
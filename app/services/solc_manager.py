@@ -0,0 +1,175 @@
+import asyncio
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from solcx import get_installable_solc_versions, get_installed_solc_versions, install_solc
+from solcx.install import get_executable
+
+from app.config import settings
+from app.services.solidity_rules import PRAGMA_RE, blank_comments_and_strings
+
+COMPARATOR_RE = re.compile(r"(\^|~|>=|<=|>|<|=)?\s*v?(\d+(?:\.\d+){0,2})")
+HYPHEN_RANGE_RE = re.compile(r"(\d+(?:\.\d+){0,2})\s+-\s+(\d+(?:\.\d+){0,2})")
+
+
+class SolcUnavailableError(Exception):
+    """Raised when no solc binary can be provided for a source"""
+
+
+class SolcManager:
+    """Chooses and provides the solc binary for each source.
+
+    Installed compilers are scanned once and their executables kept ready.
+    A source compiles with the newest installed version its pragmas allow
+    (SOLC_VERSION when it has none). When nothing installed fits, the newest
+    matching release is downloaded in the background, once per version, with
+    concurrent requests for it sharing the install.
+    """
+
+    def __init__(self):
+        self.default_version = settings.SOLC_VERSION
+        self.install_dir = settings.SOLC_INSTALL_DIR or None
+        self._binaries: Optional[Dict[str, str]] = None
+        self._installs: Dict[str, asyncio.Task] = {}
+        self._installable: Optional[List[str]] = None
+
+    async def start(self) -> None:
+        """Scan installed compilers and pre-install the configured versions in the background"""
+
+        await self._scan()
+        preinstall = [self.default_version] + [
+            version.strip() for version in settings.SOLC_PREINSTALL_VERSIONS.split(",") if version.strip()
+        ]
+        for version in preinstall:
+            if version not in self._binaries:
+                self._install(version)
+
+    async def resolve(self, source_code: str, dependency_specs: Iterable[str] = ()) -> Tuple[str, str]:
+        """Version and binary to compile ``source_code`` with, installing the version if needed.
+
+        ``dependency_specs`` are the pragmas of the sources it imports.
+        """
+
+        if self._binaries is None:
+            await self._scan()
+
+        specs = pragma_specs(source_code) + list(dependency_specs)
+        if not specs:
+            version = self.default_version
+        else:
+            version = newest(self._binaries, specs)
+            if version is None:
+                version = newest(await self._installable_versions(), specs)
+            if version is None:
+                raise SolcUnavailableError(f"No solc release satisfies pragma solidity {' '.join(specs)}")
+
+        if version not in self._binaries:
+            await asyncio.shield(self._install(version))
+        return version, self._binaries[version]
+
+    def binary(self, version: str) -> Optional[str]:
+        """Path of an installed solc version, for tools that compile on their own"""
+        return (self._binaries or {}).get(version)
+
+    def versions(self) -> dict:
+        return {
+            "default": self.default_version,
+            "installed": sorted(self._binaries or {}, key=version_tuple),
+            "installing": sorted(self._installs, key=version_tuple)
+        }
+
+    async def _scan(self) -> None:
+        self._binaries = await asyncio.to_thread(self._find_installed)
+
+    def _find_installed(self) -> Dict[str, str]:
+        binaries = {}
+        for version in get_installed_solc_versions(solcx_binary_path=self.install_dir):
+            try:
+                binaries[str(version)] = str(get_executable(version, solcx_binary_path=self.install_dir))
+            except Exception:
+                continue
+        return binaries
+
+    async def _installable_versions(self) -> List[str]:
+        if self._installable is None:
+            try:
+                versions = await asyncio.to_thread(get_installable_solc_versions)
+            except Exception as e:
+                raise SolcUnavailableError(f"Could not list installable solc versions: {e}")
+            self._installable = [str(version) for version in versions]
+        return self._installable
+
+    def _install(self, version: str) -> asyncio.Task:
+        task = self._installs.get(version)
+        if task is None:
+            task = asyncio.create_task(self._download(version))
+            self._installs[version] = task
+            task.add_done_callback(lambda t: self._install_done(version, t))
+        return task
+
+    def _install_done(self, version: str, task: asyncio.Task) -> None:
+        self._installs.pop(version, None)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Warning: Could not install solc {version}: {task.exception()}")
+
+    async def _download(self, version: str) -> None:
+        try:
+            await asyncio.to_thread(install_solc, version, solcx_binary_path=self.install_dir)
+            path = await asyncio.to_thread(get_executable, version, solcx_binary_path=self.install_dir)
+        except Exception as e:
+            raise SolcUnavailableError(f"Could not install solc {version}: {e}")
+        self._binaries[version] = str(path)
+
+
+def pragma_specs(source_code: str) -> List[str]:
+    """Version constraints from the ``pragma solidity`` lines of a source"""
+    return [m.group(1).strip() for m in PRAGMA_RE.finditer(blank_comments_and_strings(source_code))]
+
+
+def version_tuple(version: str) -> Tuple[int, ...]:
+    parts = [int(part) for part in version.split(".")[:3]]
+    return tuple(parts + [0] * (3 - len(parts)))
+
+
+def satisfies(version: str, spec: str) -> bool:
+    """Whether a version meets a pragma constraint (``^``, ``~``, comparisons, ranges and ``||``)"""
+
+    current = version_tuple(version)
+    spec = HYPHEN_RANGE_RE.sub(r">=\1 <=\2", spec)
+
+    for alternative in spec.split("||"):
+        comparators = COMPARATOR_RE.findall(alternative)
+        if comparators and all(_compare(current, op, bound) for op, bound in comparators):
+            return True
+    return False
+
+
+def _compare(current: Tuple[int, ...], op: str, bound: str) -> bool:
+    target = version_tuple(bound)
+    if op == "^":
+        major, minor, patch = target
+        upper = (major + 1, 0, 0) if major else (0, minor + 1, 0) if minor else (0, 0, patch + 1)
+        return target <= current < upper
+    if op == "~":
+        return target <= current < (target[0], target[1] + 1, 0)
+    if op == ">=":
+        return current >= target
+    if op == "<=":
+        return current <= target
+    if op == ">":
+        return current > target
+    if op == "<":
+        return current < target
+    # Exact, where a partial version ("0.8") matches any release under it
+    depth = len(bound.split("."))
+    return current[:depth] == target[:depth]
+
+
+def newest(versions, specs: List[str]) -> Optional[str]:
+    """Newest version meeting every constraint"""
+
+    matching = [v for v in versions if all(satisfies(v, spec) for spec in specs)]
+    return max(matching, key=version_tuple) if matching else None
+
+
+solc_manager = SolcManager()
@@ -0,0 +1,287 @@
+"""
+Fast in-process Solidity pre-scan.
+
+The source is parsed once into a light structural model (pragmas, contracts,
+functions with their headers and bodies) with comments and string literals
+blanked out, then a set of pattern rules runs over it. This takes
+milliseconds and gives a first answer while Slither and Mythril run.
+"""
+
+import bisect
+import re
+from typing import Callable, List, Optional
+
+FUNCTION_RE = re.compile(r"\b(?:function\s+(\w+)|(constructor|receive|fallback))\s*\(")
+CONTRACT_RE = re.compile(r"\b(contract|library|interface)\s+(\w+)[^{;]*\{")
+TERMINATOR_RE = re.compile(r"[{;]")
+PRAGMA_RE = re.compile(r"\bpragma\s+solidity\s+([^;]+);")
+VERSION_RE = re.compile(r"(\d+)\.(\d+)(?:\.(\d+))?")
+
+VISIBILITIES = {"external", "public", "internal", "private"}
+READ_ONLY = {"view", "pure"}
+
+
+class Function:
+    """A function, constructor, receive or fallback declaration"""
+
+    def __init__(self, name: str, contract: Optional[str], kind: str, header: str,
+                 body: Optional[str], start: int):
+        self.name = name
+        self.contract = contract
+        self.kind = kind  # "contract", "library" or "interface"
+        self.header = header
+        self.body = body
+        self.start = start
+
+        words = set(re.findall(r"\w+", header))
+        if name in ("receive", "fallback"):
+            words.add("external")
+        self.visibility = next((w for w in words if w in VISIBILITIES), "public")
+        self.read_only = bool(words & READ_ONLY)
+        self.modifiers = words
+
+    @property
+    def is_entry_point(self) -> bool:
+        return self.visibility in ("external", "public") and not self.read_only and self.name != "constructor"
+
+
+class SourceUnit:
+    """Parsed view of one Solidity source"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.code = blank_comments_and_strings(source)
+        self._line_starts = [0] + [m.end() for m in re.finditer(r"\n", source)]
+        self.pragmas = [(m.group(1).strip(), m.start()) for m in PRAGMA_RE.finditer(self.code)]
+        self.functions = self._parse_functions()
+
+    def line(self, offset: int) -> int:
+        return bisect.bisect_right(self._line_starts, offset)
+
+    def _parse_functions(self) -> List[Function]:
+        contracts = []
+        for match in CONTRACT_RE.finditer(self.code):
+            end = matching(self.code, match.end() - 1, "{", "}")
+            contracts.append((match.start(), end, match.group(1), match.group(2)))
+
+        functions = []
+        for match in FUNCTION_RE.finditer(self.code):
+            params_end = matching(self.code, match.end() - 1, "(", ")")
+            if params_end is None:
+                continue
+
+            terminator = TERMINATOR_RE.search(self.code, params_end)
+            if terminator is None:
+                continue
+
+            header = self.code[params_end + 1:terminator.start()]
+            body = None
+            if terminator.group() == "{":
+                body_end = matching(self.code, terminator.start(), "{", "}")
+                body = self.code[terminator.start():(body_end or len(self.code)) + 1]
+
+            owner = next((c for c in contracts if c[0] < match.start() < (c[1] or len(self.code))), None)
+            functions.append(Function(
+                name=match.group(1) or match.group(2),
+                contract=owner[3] if owner else None,
+                kind=owner[2] if owner else "contract",
+                header=header,
+                body=body,
+                start=match.start()
+            ))
+        return functions
+
+
+def blank_comments_and_strings(source: str) -> str:
+    """Replace comment and string contents with spaces, keeping offsets and newlines"""
+
+    out = list(source)
+    i, n = 0, len(source)
+    while i < n:
+        ch = source[i]
+        nxt = source[i + 1] if i + 1 < n else ""
+        if ch == "/" and nxt == "/":
+            while i < n and source[i] != "\n":
+                out[i] = " "
+                i += 1
+        elif ch == "/" and nxt == "*":
+            end = source.find("*/", i + 2)
+            end = n if end == -1 else end + 2
+            for j in range(i, end):
+                if source[j] != "\n":
+                    out[j] = " "
+            i = end
+        elif ch in ("'", '"'):
+            j = i + 1
+            while j < n and source[j] != ch and source[j] != "\n":
+                step = 2 if source[j] == "\\" else 1
+                for k in range(j, min(j + step, n)):
+                    if source[k] != "\n":
+                        out[k] = " "
+                j += step
+            i = j + 1
+        else:
+            i += 1
+    return "".join(out)
+
+
+def matching(code: str, start: int, opening: str, closing: str) -> Optional[int]:
+    """Offset of the bracket closing the one at ``start``"""
+
+    depth = 0
+    for i in range(start, len(code)):
+        if code[i] == opening:
+            depth += 1
+        elif code[i] == closing:
+            depth -= 1
+            if depth == 0:
+                return i
+    return None
+
+
+def statement_prefix(code: str, offset: int) -> str:
+    """Text of the current statement before ``offset``"""
+
+    start = max(code.rfind(";", 0, offset), code.rfind("{", 0, offset), code.rfind("}", 0, offset))
+    return code[start + 1:offset]
+
+
+def issue(unit: SourceUnit, offset: int, check: str, severity: str, confidence: str,
+          swc_id: str, description: str) -> dict:
+    return {
+        "tool": "prescan",
+        "severity": severity,
+        "confidence": confidence,
+        "description": description,
+        "check": check,
+        "swc_id": swc_id,
+        "line": unit.line(offset)
+    }
+
+
+# ==================== Rules ====================
+
+def rule_floating_pragma(unit: SourceUnit) -> List[dict]:
+    issues = []
+    for spec, offset in unit.pragmas:
+        if re.search(r"[\^~<>*]|\|\|| - ", spec):
+            issues.append(issue(
+                unit, offset, "floating-pragma", "low", "High", "SWC-103",
+                f"Floating pragma 'solidity {spec}': lock the compiler version you tested with"
+            ))
+    return issues
+
+
+def rule_outdated_compiler(unit: SourceUnit) -> List[dict]:
+    issues = []
+    for spec, offset in unit.pragmas:
+        versions = [tuple(int(v or 0) for v in m.groups()) for m in VERSION_RE.finditer(spec)]
+        if versions and min(versions) < (0, 8, 0):
+            issues.append(issue(
+                unit, offset, "outdated-compiler", "medium", "Medium", "SWC-101",
+                f"Pragma 'solidity {spec}' allows compilers before 0.8.0, which lack checked arithmetic"
+            ))
+    return issues
+
+
+def rule_tx_origin(unit: SourceUnit) -> List[dict]:
+    issues = []
+    for match in re.finditer(r"tx\.origin\s*[!=]=|[!=]=\s*tx\.origin", unit.code):
+        issues.append(issue(
+            unit, match.start(), "tx-origin", "high", "Medium", "SWC-115",
+            "tx.origin used for authorization; a malicious contract called by the owner can pass this check"
+        ))
+    return issues
+
+
+def rule_delegatecall(unit: SourceUnit) -> List[dict]:
+    issues = []
+    for match in re.finditer(r"\.delegatecall\s*\(", unit.code):
+        issues.append(issue(
+            unit, match.start(), "delegatecall", "high", "Medium", "SWC-112",
+            "delegatecall runs external code against this contract's storage; the target must be trusted"
+        ))
+    return issues
+
+
+def rule_unchecked_call(unit: SourceUnit) -> List[dict]:
+    issues = []
+    for match in re.finditer(r"\.(call|send|delegatecall|staticcall)\s*(\{[^}]*\})?\s*\(", unit.code):
+        prefix = statement_prefix(unit.code, match.start())
+        if re.search(r"=|\b(require|assert|if|return)\b", prefix):
+            continue
+        issues.append(issue(
+            unit, match.start(), "unchecked-call", "medium", "High", "SWC-104",
+            f"Return value of low-level .{match.group(1)} is not checked; failures pass silently"
+        ))
+    return issues
+
+
+def rule_missing_reentrancy_guard(unit: SourceUnit) -> List[dict]:
+    issues = []
+    for function in unit.functions:
+        if function.body is None or function.kind == "interface" or not function.is_entry_point:
+            continue
+        if "nonReentrant" in function.modifiers:
+            continue
+        if sends_ether(function.body):
+            issues.append(issue(
+                unit, function.start, "missing-reentrancy-guard", "medium", "Medium", "SWC-107",
+                f"{function.contract or ''}.{function.name}() transfers Ether without the nonReentrant modifier"
+            ))
+    return issues
+
+
+def rule_selfdestruct(unit: SourceUnit) -> List[dict]:
+    issues = []
+    for match in re.finditer(r"\bselfdestruct\s*\(", unit.code):
+        issues.append(issue(
+            unit, match.start(), "selfdestruct", "medium", "Medium", "SWC-106",
+            "selfdestruct can remove the contract and drain its balance; make sure it is access controlled"
+        ))
+    return issues
+
+
+def sends_ether(body: str) -> bool:
+    if re.search(r"\.call\s*\{[^}]*\bvalue\s*:|\.send\s*\(", body):
+        return True
+
+    # address.transfer(amount) takes one argument; ERC-20 transfer(to, amount) takes two
+    for match in re.finditer(r"\.transfer\s*\(", body):
+        end = matching(body, match.end() - 1, "(", ")")
+        if end is not None and top_level_commas(body[match.end():end]) == 0:
+            return True
+    return False
+
+
+def top_level_commas(args: str) -> int:
+    depth, commas = 0, 0
+    for ch in args:
+        if ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            commas += 1
+    return commas
+
+
+RULES: List[Callable[[SourceUnit], List[dict]]] = [
+    rule_tx_origin,
+    rule_delegatecall,
+    rule_unchecked_call,
+    rule_missing_reentrancy_guard,
+    rule_selfdestruct,
+    rule_floating_pragma,
+    rule_outdated_compiler
+]
+
+
+def scan(source: str) -> List[dict]:
+    """Parse a source once and run every rule over it"""
+
+    unit = SourceUnit(source)
+    issues = []
+    for rule in RULES:
+        issues.extend(rule(unit))
+    return sorted(issues, key=lambda i: i["line"])
@@ -0,0 +1,249 @@
+import asyncio
+import heapq
+import itertools
+import os
+import shutil
+import signal
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import List, Optional
+
+from app.services.sandbox import SANDBOX_SUPPORTED, ResourceLimits, limit_exceeded, read_usage, sandbox_command
+
+
+class QueueFullError(Exception):
+    """Raised when a tool's wait queue has no room for another job"""
+
+    def __init__(self, tool: str, depth: int):
+        self.tool = tool
+        self.depth = depth
+        super().__init__(f"{tool} queue is full ({depth} jobs waiting), retry later")
+
+
+@dataclass
+class ProcessResult:
+    returncode: int
+    stdout: str
+    stderr: str
+    duration: float
+    interrupted: bool = False  # Stopped at the deadline with SIGINT but exited cleanly
+    peak_rss_mb: Optional[float] = None  # Resource usage, recorded for sandboxed runs
+    cpu_seconds: Optional[float] = None
+    limit_exceeded: Optional[str] = None  # "memory" or "cpu" when a sandbox limit stopped the run
+
+    def resources(self) -> dict:
+        return {
+            "peak_rss_mb": self.peak_rss_mb,
+            "cpu_seconds": self.cpu_seconds,
+            "limit_exceeded": self.limit_exceeded
+        }
+
+
+class ToolPool:
+    """Bounded execution slots for one external analysis tool.
+
+    At most ``max_concurrency`` jobs run at once; the rest wait in a priority
+    queue (lower value first, FIFO within a priority) of at most ``max_queue``
+    entries. Subprocesses are spawned with asyncio so the event loop is never
+    blocked while a tool runs, under the pool's ``limits`` if set.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        limits: Optional[ResourceLimits] = None
+    ):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.limits = limits
+
+        self._active = 0
+        self._waiters: list = []
+        self._sequence = itertools.count()
+
+        # Metrics
+        self._submitted = 0
+        self._rejected = 0
+        self._completed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_count = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, priority: int = 0) -> None:
+        """Wait for a free slot"""
+
+        self._submitted += 1
+        started = time.monotonic()
+
+        if self._active < self.max_concurrency and not self.queue_depth:
+            self._active += 1
+            self._record_wait(0.0)
+            return
+
+        if self.queue_depth >= self.max_queue:
+            self._rejected += 1
+            raise QueueFullError(self.name, self.queue_depth)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before cancellation
+                self.release()
+            raise
+
+        self._record_wait(time.monotonic() - started)
+
+    def release(self) -> None:
+        """Free a slot, handing it directly to the next waiter if any"""
+
+        self._completed += 1
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+
+        self._active = max(0, self._active - 1)
+
+    @asynccontextmanager
+    async def slot(self, priority: int = 0):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def run(
+        self,
+        args: List[str],
+        timeout: float,
+        cwd: Optional[str] = None,
+        priority: int = 0
+    ) -> ProcessResult:
+        """Run a command inside a slot, killing it if it exceeds ``timeout``"""
+
+        async with self.slot(priority):
+            return await run_process(args, timeout, cwd, limits=self.limits)
+
+    def _record_wait(self, waited: float) -> None:
+        self._wait_total += waited
+        self._wait_count += 1
+        self._wait_max = max(self._wait_max, waited)
+
+    def stats(self) -> dict:
+        return {
+            "tool": self.name,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "limits": vars(self.limits) if self.limits else None,
+            "active": self._active,
+            "queue_depth": self.queue_depth,
+            "submitted": self._submitted,
+            "rejected": self._rejected,
+            "completed": self._completed,
+            "wait_seconds": {
+                "avg": round(self._wait_total / self._wait_count, 3) if self._wait_count else 0.0,
+                "max": round(self._wait_max, 3)
+            }
+        }
+
+
+async def run_process(
+    args: List[str],
+    timeout: float,
+    cwd: Optional[str] = None,
+    interrupt_grace: Optional[float] = None,
+    limits: Optional[ResourceLimits] = None
+) -> ProcessResult:
+    """Run a subprocess without blocking the event loop.
+
+    At ``timeout`` the process is killed and ``asyncio.TimeoutError`` raised.
+    With ``interrupt_grace``, it is first sent SIGINT and given that many
+    seconds to flush partial output; if it exits in time, its output is
+    returned with ``interrupted`` set. With ``limits``, it runs under the
+    sandbox launcher and the result records its peak RSS, CPU time and any
+    limit it hit; where the sandbox is unsupported (Windows) it runs
+    unlimited and those are None, and it is killed at ``timeout`` without an
+    interrupt. ``FileNotFoundError`` is raised if the executable is missing.
+    """
+
+    sandboxed = SANDBOX_SUPPORTED and limits is not None and limits.enabled
+    usage_file = None
+    command = args
+    if sandboxed:
+        if shutil.which(args[0]) is None:
+            raise FileNotFoundError(args[0])
+        fd, usage_file = tempfile.mkstemp(prefix="sandbox-", suffix=".json")
+        os.close(fd)
+        command = sandbox_command(args, limits, usage_file)
+
+    try:
+        started = time.monotonic()
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            cwd=cwd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=sandboxed
+        )
+        output = asyncio.gather(process.stdout.read(), process.stderr.read(), process.wait())
+        interrupted = False
+
+        try:
+            done, _ = await asyncio.wait([output], timeout=timeout)
+            if not done and interrupt_grace and os.name == "posix":
+                process.send_signal(signal.SIGINT)
+                interrupted = True
+                done, _ = await asyncio.wait([output], timeout=interrupt_grace)
+            if not done:
+                raise asyncio.TimeoutError()
+        except BaseException:
+            if process.returncode is None:
+                kill(process, sandboxed)
+            await asyncio.gather(output, return_exceptions=True)
+            raise
+
+        stdout, stderr, _ = output.result()
+        result = ProcessResult(
+            returncode=process.returncode,
+            stdout=stdout.decode(errors="replace"),
+            stderr=stderr.decode(errors="replace"),
+            duration=time.monotonic() - started,
+            interrupted=interrupted
+        )
+
+        usage = read_usage(usage_file) if sandboxed else None
+        if usage:
+            result.returncode = usage["returncode"]
+            result.peak_rss_mb = usage["peak_rss_mb"]
+            result.cpu_seconds = usage["cpu_seconds"]
+            result.limit_exceeded = limit_exceeded(usage, result.stderr, limits)
+        return result
+    finally:
+        if usage_file:
+            os.unlink(usage_file)
+
+
+def kill(process: asyncio.subprocess.Process, sandboxed: bool) -> None:
+    """Kill a process, and for sandboxed runs the tool under the launcher too"""
+
+    try:
+        if sandboxed:  # Only ever true on POSIX
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
@@ -0,0 +1 @@
+# INFRA FORGE benchmarks
@@ -0,0 +1,21 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+contract BenchmarkCounter {
+    address public owner;
+    uint256 public count;
+    mapping(address => uint256) public increments;
+
+    event Incremented(address indexed by, uint256 count);
+
+    constructor(uint256 initialCount) {
+        owner = msg.sender;
+        count = initialCount;
+    }
+
+    function increment() external {
+        count += 1;
+        increments[msg.sender] += 1;
+        emit Incremented(msg.sender, count);
+    }
+}
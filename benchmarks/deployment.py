@@ -0,0 +1,300 @@
+"""Throughput and latency benchmark of the compile, estimate-gas and deploy endpoints.
+
+Starts a local chain (anvil, or an eth-tester stand-in) with the chain ID
+of ``--chain``, runs the API under uvicorn with that chain's RPC pointed at
+it, and sends each scenario's requests at the given concurrency. The
+report (JSON) has p50/p95/p99 latency, throughput and the per-phase
+timings the API returns (compile, preflight, sign, broadcast, receipt).
+
+    python -m benchmarks.deployment --concurrency 8 --requests 200 --output run.json
+    python -m benchmarks.deployment --baseline run.json   # Exits 1 on a regression
+
+With ``--base-url`` an already running API is used instead; its RPC for
+``--chain`` and the ``--private-key`` accounts must already be set up.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+
+from benchmarks.local_chain import LocalChain
+
+SCENARIOS = ["compile", "estimate-gas", "deploy"]
+DEFAULT_SOURCE = Path(__file__).parent / "contracts" / "BenchmarkCounter.sol"
+API_STARTUP_TIMEOUT_SECONDS = 60
+
+
+class RequestFailed(Exception):
+    """Raised when the API answers with an error status"""
+
+
+async def run_scenario(
+    send: Callable[[int], Awaitable[dict]],
+    requests: int,
+    concurrency: int,
+    warmup: int
+) -> dict:
+    """Send ``requests`` requests from ``concurrency`` workers and summarize them"""
+
+    for i in range(warmup):
+        try:
+            await send(-1 - i)
+        except Exception:
+            pass
+
+    latencies: List[float] = []
+    phases: Dict[str, List[float]] = {}
+    errors: List[str] = []
+    counter = itertools.count()
+
+    async def worker():
+        while (i := next(counter)) < requests:
+            started = time.perf_counter()
+            try:
+                result = await send(i)
+            except Exception as e:
+                errors.append(str(e))
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            for phase, ms in (result.get("timings_ms") or {}).items():
+                phases.setdefault(phase, []).append(ms)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:5],
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(latencies) / duration, 2),
+        "latency_ms": summarize(latencies),
+        "phases_ms": {phase: summarize(samples) for phase, samples in phases.items()}
+    }
+
+
+def summarize(samples: List[float]) -> Optional[dict]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return {
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "mean": round(sum(ordered) / len(ordered), 1),
+        "max": round(ordered[-1], 1)
+    }
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted samples"""
+
+    return round(ordered[max(math.ceil(q / 100 * len(ordered)) - 1, 0)], 1)
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> dict:
+    """p95 latency and throughput of each scenario against a previous report"""
+
+    comparison = {}
+    for scenario, result in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(scenario)
+        if not previous or not previous["latency_ms"] or not result["latency_ms"]:
+            continue
+
+        p95_change = result["latency_ms"]["p95"] / previous["latency_ms"]["p95"] - 1
+        throughput_change = result["throughput_rps"] / previous["throughput_rps"] - 1
+        comparison[scenario] = {
+            "p95_change": round(p95_change, 3),
+            "throughput_change": round(throughput_change, 3),
+            "regressed": p95_change > max_regression or throughput_change < -max_regression
+        }
+    return comparison
+
+
+class ApiServer:
+    """The API under uvicorn, with one chain's RPC overridden"""
+
+    def __init__(self, port: int, env: Dict[str, str]):
+        self.url = f"http://127.0.0.1:{port}"
+        self.port = port
+        self.env = env
+        self._process: Optional[subprocess.Popen] = None
+
+    async def __aenter__(self) -> "ApiServer":
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(self.port), "--log-level", "warning"],
+            env={**os.environ, **self.env}
+        )
+
+        deadline = time.monotonic() + API_STARTUP_TIMEOUT_SECONDS
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    async with session.get(f"{self.url}/health") as response:
+                        if response.status == 200:
+                            return self
+                except aiohttp.ClientError:
+                    pass
+                if self._process.poll() is not None or time.monotonic() > deadline:
+                    await self.__aexit__(None, None, None)
+                    raise RuntimeError(f"API did not start on port {self.port}")
+                await asyncio.sleep(0.2)
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait()
+            self._process = None
+
+
+async def benchmark(args: argparse.Namespace, base_url: str, private_keys: List[str]) -> dict:
+    source = Path(args.source).read_text()
+    api = f"{base_url}/api/deployment"
+
+    def source_for(i: int) -> str:
+        # A unique trailing comment defeats the compile cache
+        return f"{source}\n// benchmark {time.time_ns()} {i}\n" if args.cold_compile else source
+
+    def body(i: int) -> dict:
+        return {
+            "chain": args.chain,
+            "source_code": source_for(i),
+            "contract_name": args.contract_name,
+            "constructor_args": args.constructor_args,
+            "private_key": private_keys[i % len(private_keys)]
+        }
+
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+
+        async def post(path: str, **kwargs) -> dict:
+            async with session.post(f"{api}{path}", **kwargs) as response:
+                result = await response.json(content_type=None)
+                if response.status != 200:
+                    raise RequestFailed(f"{response.status}: {result.get('detail', result)}")
+                return result
+
+        requests = {
+            "compile": lambda i: post(
+                "/compile", params={"source_code": source_for(i), "contract_name": args.contract_name}
+            ),
+            "estimate-gas": lambda i: post("/estimate-gas", json=body(i)),
+            "deploy": lambda i: post("/deploy", json=body(i))
+        }
+
+        scenarios = {}
+        for scenario in args.scenarios:
+            scenarios[scenario] = await run_scenario(
+                requests[scenario], args.requests, args.concurrency, args.warmup
+            )
+            print(f"{scenario}: {json.dumps(scenarios[scenario]['latency_ms'])}", file=sys.stderr)
+    return scenarios
+
+
+async def main(args: argparse.Namespace) -> int:
+    from app.services.deployment_service import CHAINS
+
+    if args.chain not in CHAINS:
+        raise SystemExit(f"Unsupported chain: {args.chain}")
+
+    meta = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "chain": args.chain,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "warmup": args.warmup,
+        "cold_compile": args.cold_compile,
+        "contract": f"{Path(args.source).name}:{args.contract_name}"
+    }
+
+    if args.base_url:
+        meta["backend"] = "external"
+        scenarios = await benchmark(args, args.base_url, args.private_key or [])
+    else:
+        with LocalChain(free_port(), CHAINS[args.chain]["chain_id"], args.backend) as chain:
+            meta["backend"] = chain.backend
+            env = {f"{args.chain.upper()}_RPC": chain.url}
+            async with ApiServer(free_port(), env) as server:
+                keys = args.private_key or chain.private_keys()[:args.accounts]
+                scenarios = await benchmark(args, server.url, keys)
+
+    report = {"meta": meta, "scenarios": scenarios}
+    regressed = False
+    if args.baseline:
+        report["comparison"] = compare(report, json.loads(Path(args.baseline).read_text()), args.max_regression)
+        regressed = any(result["regressed"] for result in report["comparison"].values())
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+    return 1 if regressed else 0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chain", default="ethereum_sepolia", help="Chain whose RPC the local chain replaces")
+    parser.add_argument("--scenarios", type=lambda s: s.split(","), default=SCENARIOS,
+                        help=f"Comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=50, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=3, help="Unmeasured requests before each scenario")
+    parser.add_argument("--accounts", type=int, default=1, help="Funded accounts deployments rotate through")
+    parser.add_argument("--source", default=str(DEFAULT_SOURCE))
+    parser.add_argument("--contract-name", default="BenchmarkCounter")
+    parser.add_argument("--constructor-args", type=json.loads, default=[1], help="JSON list")
+    parser.add_argument("--cold-compile", action="store_true", help="Make every source unique to bypass caches")
+    parser.add_argument("--backend", choices=["anvil", "eth-tester"], help="Local chain; default anvil if installed")
+    parser.add_argument("--base-url", help="Benchmark a running API instead of starting one")
+    parser.add_argument("--private-key", action="append", help="Deployer key (repeatable); with --base-url")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds per request")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Previous report to compare p95 latency and throughput with")
+    parser.add_argument("--max-regression", type=float, default=0.1,
+                        help="Allowed fractional p95 increase or throughput drop before exiting 1")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    if args.base_url and "deploy" in args.scenarios and not args.private_key:
+        parser.error("--private-key is required to deploy through --base-url")
+    return args
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,148 @@
+"""Local development chain for benchmarks.
+
+Runs anvil when it is installed; otherwise an eth-tester (py-evm) chain
+served over HTTP JSON-RPC stands in for it. Both mine every transaction
+immediately and fund ten accounts whose keys are returned by
+``LocalChain.private_keys``.
+
+    python -m benchmarks.local_chain --port 8545 --chain-id 11155111
+"""
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+ANVIL_MNEMONIC = "test test test test test test test test test test test junk"
+FUNDED_ACCOUNTS = 10
+STARTUP_TIMEOUT_SECONDS = 30
+
+
+class LocalChain:
+    """A local chain process with the given chain ID, stopped on exit"""
+
+    def __init__(self, port: int, chain_id: int, backend: Optional[str] = None):
+        self.port = port
+        self.chain_id = chain_id
+        self.backend = backend or ("anvil" if shutil.which("anvil") else "eth-tester")
+        self.url = f"http://127.0.0.1:{port}"
+        self._process: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> "LocalChain":
+        if self.backend == "anvil":
+            command = ["anvil", "--port", str(self.port), "--chain-id", str(self.chain_id), "--silent"]
+        else:
+            command = [
+                sys.executable, "-m", "benchmarks.local_chain",
+                "--port", str(self.port), "--chain-id", str(self.chain_id)
+            ]
+        self._process = subprocess.Popen(command)
+
+        deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+        while True:
+            try:
+                rpc(self.url, "eth_chainId")
+                return self
+            except OSError:
+                if self._process.poll() is not None or time.monotonic() > deadline:
+                    self.__exit__(None, None, None)
+                    raise RuntimeError(f"Local chain ({self.backend}) did not start on port {self.port}")
+                time.sleep(0.2)
+
+    def __exit__(self, *exc_info) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait()
+            self._process = None
+
+    def private_keys(self) -> List[str]:
+        """Keys of the accounts funded at genesis"""
+
+        if self.backend == "anvil":
+            from eth_account import Account
+
+            Account.enable_unaudited_hdwallet_features()
+            return [
+                "0x" + bytes(Account.from_mnemonic(ANVIL_MNEMONIC, account_path=f"m/44'/60'/0'/0/{i}").key).hex()
+                for i in range(FUNDED_ACCOUNTS)
+            ]
+        # eth-tester funds the accounts of keys 1..10
+        return [f"0x{i:064x}" for i in range(1, FUNDED_ACCOUNTS + 1)]
+
+
+def rpc(url: str, method: str, params: Optional[list] = None):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params or []}).encode(),
+        headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())["result"]
+
+
+def serve(port: int, chain_id: int) -> None:
+    """eth-tester chain behind a JSON-RPC HTTP server (single requests and batches)"""
+
+    from hexbytes import HexBytes
+    from web3 import EthereumTesterProvider, Web3
+
+    w3 = Web3(EthereumTesterProvider())
+    lock = threading.Lock()  # eth-tester is not thread-safe
+
+    def encode(value):
+        if isinstance(value, bool) or value is None or isinstance(value, str):
+            return value
+        if isinstance(value, int):
+            return hex(value)
+        if isinstance(value, (bytes, HexBytes)):
+            return "0x" + bytes(value).hex()
+        if hasattr(value, "items"):
+            return {key: encode(item) for key, item in value.items()}
+        return [encode(item) for item in value]
+
+    def handle(call: dict) -> dict:
+        method, params = call["method"], call.get("params") or []
+        try:
+            if method == "eth_chainId":
+                # eth-tester's chain ID is fixed; report the one being stood in for
+                result = hex(chain_id)
+            else:
+                if method in ("eth_call", "eth_estimateGas") and "from" not in params[0]:
+                    params[0]["from"] = w3.eth.accounts[0]
+                result = encode(w3.manager.request_blocking(method, params))
+            return {"jsonrpc": "2.0", "id": call.get("id"), "result": result}
+        except Exception as e:
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": -32000, "message": str(e)}}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with lock:
+                result = [handle(call) for call in body] if isinstance(body, list) else handle(body)
+            response = json.dumps(result).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="eth-tester JSON-RPC stand-in for a local dev chain")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument("--chain-id", type=int, default=31337)
+    args = parser.parse_args()
+    serve(args.port, args.chain_id)
@@ -0,0 +1,9 @@
+import os
+
+# Required settings without defaults, so app.config loads without a .env file
+for name in [
+    "ANTHROPIC_API_KEY", "JWT_SECRET", "ENCRYPTION_KEY",
+    "ETHEREUM_RPC", "ETHEREUM_SEPOLIA_RPC", "BSC_RPC", "BSC_TESTNET_RPC", "POLYGON_RPC",
+    "POLYGON_MUMBAI_RPC", "ARBITRUM_RPC", "AVALANCHE_RPC", "FANTOM_RPC"
+]:
+    os.environ.setdefault(name, "test")
@@ -0,0 +1,114 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.routers import chat as chat_router
+from app.schemas.chat import ChatMessage, ChatRequest
+from app.services import claude_service as claude_module
+from app.services.claude_service import ClaudeService
+
+CHUNKS = ["one ", "two ", "three ", "four ", "five"]
+CHUNK_DELAY = 0.05
+MESSAGES = [{"role": "user", "content": "Write an ERC-20 token"}]
+
+
+class FakeStream:
+    """Stand-in for the SDK's message stream: yields text chunks with a non-blocking delay each"""
+
+    def __init__(self):
+        self.chunks_sent = 0
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+
+    @property
+    def text_stream(self):
+        return self._text()
+
+    async def _text(self):
+        for chunk in CHUNKS:
+            await asyncio.sleep(CHUNK_DELAY)
+            self.chunks_sent += 1
+            yield chunk
+
+    async def get_final_message(self):
+        return SimpleNamespace(usage=SimpleNamespace(
+            input_tokens=10, cache_creation_input_tokens=0, cache_read_input_tokens=0, output_tokens=len(CHUNKS)
+        ))
+
+
+class FakeAsyncAnthropic:
+    def __init__(self, **kwargs):
+        self.streams = []
+        self.messages = SimpleNamespace(stream=self._stream)
+
+    def _stream(self, **request):
+        stream = FakeStream()
+        self.streams.append(stream)
+        return stream
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(claude_module.anthropic, "AsyncAnthropic", FakeAsyncAnthropic)
+    service = ClaudeService()
+    monkeypatch.setattr(chat_router, "claude_service", service)
+    return service
+
+
+async def chat(service: ClaudeService) -> str:
+    return "".join([chunk async for chunk in service.generate_response(MESSAGES)])
+
+
+def test_concurrent_chats_stream_in_parallel(service):
+    async def run():
+        started = time.perf_counter()
+        assert await chat(service) == "".join(CHUNKS)
+        single = time.perf_counter() - started
+
+        started = time.perf_counter()
+        replies = await asyncio.gather(*(chat(service) for _ in range(10)))
+        return single, time.perf_counter() - started, replies
+
+    single, concurrent, replies = asyncio.run(run())
+
+    assert replies == ["".join(CHUNKS)] * 10
+    # Serialized, 10 chats would take 10x as long as one
+    assert concurrent < single * 2
+
+
+def test_closing_the_generator_closes_the_upstream_stream(service):
+    async def run():
+        chunks = service.generate_response(MESSAGES)
+        first = await anext(chunks)
+        await chunks.aclose()  # What the SSE endpoint does when the client disconnects
+        return first
+
+    assert asyncio.run(run()) == CHUNKS[0]
+
+    stream, = service.client.streams
+    assert stream.closed
+    assert stream.chunks_sent == 1
+    assert service.usage_stats()["requests"] == 0  # Only completed requests are recorded
+
+
+def test_closing_the_sse_response_closes_the_upstream_stream(service):
+    async def run():
+        request = ChatRequest(messages=[ChatMessage(role="user", content="Write an ERC-20 token")], stream=True)
+        response = await chat_router.send_message(request)
+        events = response.body_iterator
+        assert await anext(events) == 'data: {"content": "one "}\n\n'
+        await events.aclose()  # Starlette closes the body iterator when the client disconnects
+
+        # Checked before asyncio.run finalizes leftover generators, which would close it anyway
+        stream, = service.client.streams
+        assert stream.closed
+        assert stream.chunks_sent == 1
+
+    asyncio.run(run())
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import socket
+import time
+
+import pytest
+import aiohttp
+from aiohttp import web
+
+from app.config import settings
+from app.services.rpc import ProviderRegistry
+
+SLOW_DELAY = 0.6
+HEDGE_DELAY = 0.2
+
+
+class FakeEndpoint:
+    """Local JSON-RPC server answering every request with its own name after ``delay``, or with ``status``"""
+
+    def __init__(self, name: str, delay: float = 0.0, status: int = 200):
+        self.name = name
+        self.delay = delay
+        self.status = status
+        self.hits = []  # Monotonic arrival time of each request
+        self._runner = None
+        self.url = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.hits.append(time.monotonic())
+        body = await request.json()
+        await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return web.Response(status=self.status)
+        return web.json_response({"jsonrpc": "2.0", "id": body["id"], "result": self.name})
+
+    async def __aenter__(self) -> "FakeEndpoint":
+        app = web.Application()
+        app.router.add_post("/", self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/"
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._runner.cleanup()
+
+
+def unused_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}/"
+
+
+def registry(*urls: str) -> ProviderRegistry:
+    return ProviderRegistry({"test": {"rpc": ",".join(urls), "name": "Test"}})
+
+
+def body(method: str = "eth_blockNumber") -> bytes:
+    return json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": []}).encode()
+
+
+@pytest.fixture(autouse=True)
+def rpc_settings(monkeypatch):
+    # Without latency samples the hedge delay is a tenth of the request timeout
+    monkeypatch.setattr(settings, "RPC_TIMEOUT_SECONDS", HEDGE_DELAY * 10)
+    monkeypatch.setattr(settings, "RPC_HEDGE_PERCENTILE", 90)
+    monkeypatch.setattr(settings, "RPC_HEDGE_MIN_DELAY_MS", 50)
+    monkeypatch.setattr(settings, "RPC_EJECT_AFTER_FAILURES", 3)
+    monkeypatch.setattr(settings, "RPC_EJECT_SECONDS", 30)
+
+
+def test_hedged_read_races_the_next_endpoint_after_the_hedge_delay():
+    async def main():
+        async with FakeEndpoint("slow", delay=SLOW_DELAY) as slow, FakeEndpoint("fast") as fast:
+            providers = registry(slow.url, fast.url)
+            try:
+                started = time.monotonic()
+                reply = await providers.send("test", body(), read=True, hedge=True)
+                elapsed = time.monotonic() - started
+
+                # The first answer wins without waiting for the slow endpoint
+                assert json.loads(reply)["result"] == "fast"
+                assert elapsed < SLOW_DELAY
+                assert len(slow.hits) == 1 and len(fast.hits) == 1
+                assert fast.hits[0] - slow.hits[0] >= HEDGE_DELAY * 0.9
+
+                # The loser finishes in the background and its real latency is still recorded
+                slow_endpoint, fast_endpoint = providers.endpoints["test"]
+                assert not slow_endpoint.latencies
+                await asyncio.sleep(SLOW_DELAY)
+                assert len(slow_endpoint.latencies) == 1
+                assert slow_endpoint.latencies[0] >= SLOW_DELAY
+                assert len(fast_endpoint.latencies) == 1
+            finally:
+                await providers.shutdown()
+
+    asyncio.run(main())
+
+
+def test_read_without_hedge_waits_for_the_first_endpoint():
+    async def main():
+        async with FakeEndpoint("slow", delay=SLOW_DELAY) as slow, FakeEndpoint("fast") as fast:
+            providers = registry(slow.url, fast.url)
+            try:
+                reply = await providers.send("test", body(), read=True, hedge=False)
+                assert json.loads(reply)["result"] == "slow"
+                assert not fast.hits
+            finally:
+                await providers.shutdown()
+
+    asyncio.run(main())
+
+
+def test_read_fails_over_on_an_error_reply():
+    async def main():
+        async with FakeEndpoint("failing", status=500) as failing, FakeEndpoint("good") as good:
+            providers = registry(failing.url, good.url)
+            try:
+                reply = await providers.send("test", body(), read=True)
+                assert json.loads(reply)["result"] == "good"
+                assert len(failing.hits) == 1
+            finally:
+                await providers.shutdown()
+
+    asyncio.run(main())
+
+
+def test_write_is_not_resent_after_an_error_reply():
+    async def main():
+        async with FakeEndpoint("failing", status=500) as failing, FakeEndpoint("good") as good:
+            providers = registry(failing.url, good.url)
+            try:
+                with pytest.raises(aiohttp.ClientResponseError):
+                    await providers.send("test", body("eth_sendRawTransaction"), read=False)
+                assert len(failing.hits) == 1
+                assert not good.hits
+            finally:
+                await providers.shutdown()
+
+    asyncio.run(main())
+
+
+def test_write_is_not_resent_after_a_timeout():
+    async def main():
+        async with FakeEndpoint("hanging", delay=HEDGE_DELAY * 10 + 1) as hanging, FakeEndpoint("good") as good:
+            providers = registry(hanging.url, good.url)
+            try:
+                with pytest.raises(asyncio.TimeoutError):
+                    await providers.send("test", body("eth_sendRawTransaction"), read=False)
+                assert len(hanging.hits) == 1
+                assert not good.hits
+            finally:
+                await providers.shutdown()
+
+    asyncio.run(main())
+
+
+def test_write_fails_over_when_the_connection_cannot_be_made():
+    async def main():
+        async with FakeEndpoint("good") as good:
+            providers = registry(unused_url(), good.url)
+            try:
+                reply = await providers.send("test", body("eth_sendRawTransaction"), read=False)
+                assert json.loads(reply)["result"] == "good"
+            finally:
+                await providers.shutdown()
+
+    asyncio.run(main())
+
+
+def test_endpoint_is_ejected_after_consecutive_failures():
+    async def main():
+        async with FakeEndpoint("failing", status=500) as failing, FakeEndpoint("good") as good:
+            providers = registry(failing.url)
+            try:
+                endpoint = providers.endpoints["test"][0]
+                for _ in range(settings.RPC_EJECT_AFTER_FAILURES):
+                    assert endpoint.healthy
+                    with pytest.raises(ConnectionError):
+                        await providers.send("test", body(), read=True)
+                assert not endpoint.healthy
+                assert endpoint.consecutive_failures == settings.RPC_EJECT_AFTER_FAILURES
+            finally:
+                await providers.shutdown()
+
+            # An ejected endpoint is only tried after the healthy ones
+            providers = registry(failing.url, good.url)
+            try:
+                failing_endpoint, good_endpoint = providers.endpoints["test"]
+                for _ in range(settings.RPC_EJECT_AFTER_FAILURES):
+                    failing_endpoint.record_failure()
+                assert providers._ranked("test") == [good_endpoint, failing_endpoint]
+
+                hits = len(failing.hits)
+                reply = await providers.send("test", body(), read=True)
+                assert json.loads(reply)["result"] == "good"
+                assert len(failing.hits) == hits
+            finally:
+                await providers.shutdown()
+
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from app.services import security_service as security_module
+from app.services.security_service import MYTHRIL_MIN_RUN_SECONDS, SecurityService, mythril_run_timeouts
+from app.services.tool_pool import ProcessResult
+
+CONTRACTS = ["First", "Second", "Third"]
+
+
+def test_budget_split_evenly_when_every_contract_fits():
+    execution_timeout, timeout, grace = mythril_run_timeouts(300, 3, 600)
+
+    # 100 s share: Mythril stops itself before the process timeout, which ends with a grace period
+    assert timeout + grace == pytest.approx(100)
+    assert 0 < execution_timeout < timeout
+    assert grace > 0
+
+
+def test_budget_split_never_below_the_minimum_run():
+    # 25 s cannot give three contracts 10 s each: size the shares for two
+    execution_timeout, timeout, grace = mythril_run_timeouts(25, 3, 600)
+
+    assert timeout + grace == pytest.approx(12.5)
+    assert timeout + grace >= MYTHRIL_MIN_RUN_SECONDS
+    assert execution_timeout >= 1
+
+
+@pytest.mark.parametrize("remaining", [MYTHRIL_MIN_RUN_SECONDS - 0.01, 0, -5])
+def test_budget_split_skips_when_no_run_fits(remaining):
+    assert mythril_run_timeouts(remaining, 3, 600) is None
+
+
+def test_budget_split_timeouts_are_positive_at_the_minimum():
+    execution_timeout, timeout, grace = mythril_run_timeouts(MYTHRIL_MIN_RUN_SECONDS, 1, 600)
+
+    assert execution_timeout >= 1
+    assert timeout > 0
+    assert grace > 0
+
+
+def test_budget_split_caps_the_execution_timeout_at_the_profile():
+    execution_timeout, _, _ = mythril_run_timeouts(1000, 1, 60)
+
+    assert execution_timeout == 60
+
+
+def test_run_mythril_skips_trailing_contracts_that_would_get_less_than_the_minimum(monkeypatch):
+    minimum = 0.1
+    monkeypatch.setattr(security_module, "MYTHRIL_MIN_RUN_SECONDS", minimum)
+
+    artifact = {
+        "source_path": "Contract.sol",
+        "output": {"contracts": {"Contract.sol": {
+            name: {"evm": {"bytecode": {"object": "6080"}}} for name in CONTRACTS
+        }}}
+    }
+    timeouts = []
+
+    async def compile(*_args, **_kwargs):
+        return artifact
+
+    async def run_process(args, timeout, cwd=None, interrupt_grace=None, limits=None):
+        # Each contract uses its whole share
+        timeouts.append(timeout)
+        await asyncio.sleep(timeout + interrupt_grace)
+        return ProcessResult(returncode=0, stdout='{"issues": []}', stderr="", duration=timeout)
+
+    monkeypatch.setattr(security_module.compiler_service, "compile", compile)
+    monkeypatch.setattr(security_module, "deployable_contracts", lambda _artifact: list(CONTRACTS))
+    monkeypatch.setattr(security_module, "run_process", run_process)
+
+    service = SecurityService()
+    result = asyncio.run(service._run_mythril("", "Contract.sol", priority=0, profile="standard", budget=0.25))
+
+    assert result["success"]
+    assert result["partial"]
+    # 0.25 s fits two runs of at least 0.1 s; the third contract is skipped rather than starved
+    assert len(timeouts) == 2
+    assert all(timeout > 0 for timeout in timeouts)
+    assert result["skipped_contracts"] == ["Third"]